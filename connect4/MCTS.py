@@ -1,12 +1,15 @@
 import random
 import sys
 import math
-import time
-from copy import deepcopy
 
 import numpy as np
 import pygame
 
+from connect_state import ConnectState
+from mcts_engine import MCTS
+from opening_book import load_book
+from telemetry import TelemetrySink
+
 
 
 ROW_COUNT = 6
@@ -26,207 +29,14 @@ DRAW = 3
 WINDOW_LENGTH = 4
 
 EXPLORATION = math.sqrt(2)
+PONDER_POLL_MS = 20  # idle time per event poll on the player's turn
+TELEMETRY_PATH = "mcts_telemetry.jsonl"     # one JSON record per AI move
 
 BLUE = (0,0,255)
 BLACK = (0,0,0)
 RED =  (255,0,0)
 YELLOW = (255,255,0)
 
-class ConnectState:
-    def __init__(self):
-        self.board = np.zeros((ROW_COUNT, COLUMN_COUNT))
-        self.to_play = -1
-
-    def create_board(self):
-        self.board = np.zeros((ROW_COUNT, COLUMN_COUNT))
-        return self.board
-
-    def drop_piece(self, row, col, piece):
-        # Drop a piece in the specified row and column
-        self.board[row][col] = piece
-        return self.board
-
-    def is_valid_location(self, col):
-        # Check if the top row in the specified column is empty
-        return self.board[ROW_COUNT - 1][col] == 0
-
-    def get_next_open_row(self, col):
-        # Find the lowest empty row in the specified column
-        for r in range(ROW_COUNT):
-            if self.board[r][col] == 0:
-                return r
-        return -1
-
-    def move(self, col):
-        row = self.get_next_open_row(col)
-        piece = AI_PIECE if self.to_play == AI else PLAYER_PIECE
-        self.board = self.drop_piece(row, col, piece)
-        self.to_play = AI if self.to_play == PLAYER else PLAYER
-
-
-    def winning_move(self, piece):
-        # Check if the specified piece has won the game
-        # Check horizontally
-        for c in range(COLUMN_COUNT - 3):
-            for r in range(ROW_COUNT):
-                if self.board[r][c] == piece and self.board[r][c + 1] == piece and self.board[r][c + 2] == piece and self.board[r][c + 3] == piece:
-                    return True
-        # Check vertically
-        for c in range(COLUMN_COUNT):
-            for r in range(ROW_COUNT - 3):
-                if self.board[r][c] == piece and self.board[r + 1][c] == piece and self.board[r + 2][c] == piece and self.board[r + 3][c] == piece:
-                    return True
-        # Check diagonally (positive slope)
-        for c in range(COLUMN_COUNT - 3):
-            for r in range(ROW_COUNT - 3):
-                if self.board[r][c] == piece and self.board[r + 1][c + 1] == piece and self.board[r + 2][c + 2] == piece and self.board[r + 3][c + 3] == piece:
-                    return True
-        # Check diagonally (negative slope)
-        for c in range(COLUMN_COUNT - 3):
-            for r in range(3, ROW_COUNT):
-                if self.board[r][c] == piece and self.board[r - 1][c + 1] == piece and self.board[r - 2][c + 2] == piece and self.board[r - 3][c + 3] == piece:
-                    return True
-        return False
-
-    def is_terminal_node(self):  # Game over
-        return self.winning_move(PLAYER_PIECE) or self.winning_move(AI_PIECE) or len(self.get_valid_locations()) == 0
-
-    def get_valid_locations(self):  # Get all the columns that could drop pieces
-        valid_locations = []
-        for col in range(COLUMN_COUNT):
-            if self.is_valid_location(col):
-                valid_locations.append(col)
-        return valid_locations
-
-    def get_outcome(self):
-        if self.winning_move(PLAYER_PIECE):
-            return PLAYER_WIN
-        elif self.winning_move(AI_PIECE):
-            return AI_WIN
-        else:
-            return DRAW
-
-
-class Node:
-    def __init__(self, move, parent):
-        self.move = move
-        self.parent = parent
-        self.N = 0      #visit time
-        self.Q = 0      #rewards
-        self.children = {}
-        self.outcome = -1
-
-    def add_children(self, children: dict) -> None:
-        for child in children:
-            self.children[child.move] = child
-
-
-    def value(self, explore: float = math.sqrt(2)):
-        if self.N == 0:
-            return 0 if explore == 0 else float('inf')
-        else:
-            return self.Q / self.N + explore * math.sqrt(math.log(self.parent.N) / self.N)
-
-
-class MCTS:
-    def __init__(self, state=ConnectState()):
-        self.root_state = deepcopy(state)
-        self.root = Node(None, None)
-        self.run_time = 0
-        self.node_count = 0
-        self.num_rollouts = 0
-
-    def select_node(self) -> tuple:
-        node = self.root
-        state = deepcopy(self.root_state)
-
-        while len(node.children) != 0:
-            children = node.children.values()
-            max_value = max(children, key=lambda n: n.value()).value()
-            max_nodes = [n for n in children if n.value() == max_value]
-            #max_nodes = {n.move: n for n in children if n.value() == max_value}
-
-
-            node = random.choice(max_nodes)
-            state.move(node.move)
-
-            if node.N == 0:
-                return node, state
-
-        if self.expand(node, state):
-            node = random.choice(list(node.children.values()))
-            state.move(node.move)
-
-        return node, state
-
-    def expand(self, parent: Node, state: ConnectState) -> bool:
-        if state.is_terminal_node():
-            return False
-
-        children = [Node(move, parent) for move in state.get_valid_locations()]
-        parent.add_children(children)
-
-        return True
-
-    def roll_out(self, state: ConnectState) -> int:
-        while not state.is_terminal_node():
-            state.move(random.choice(state.get_valid_locations()))
-
-        return state.get_outcome()
-
-    def back_propagate(self, node: Node, turn: int, outcome: int) -> None:
-        # For the current player, not the next player
-        reward = 0 if outcome == turn else 1
-
-        while node is not None:
-            node.N += 1
-            node.Q += reward
-            node = node.parent
-            if outcome == DRAW:
-                reward = 0
-            else:
-                reward = 1 - reward
-
-    def search(self, time_limit: int):
-        start_time = time.process_time()
-
-        num_rollouts = 0
-        while time.process_time() - start_time < time_limit:
-            node, state = self.select_node()
-            outcome = self.roll_out(state)
-            self.back_propagate(node, state.to_play, outcome)
-            num_rollouts += 1
-
-        run_time = time.process_time() - start_time
-        self.run_time = run_time
-        self.num_rollouts = num_rollouts
-
-    def best_move(self):
-        if self.root_state.is_terminal_node():
-            return -1
-
-        max_value = max(self.root.children.values(), key=lambda n: n.N).N
-        max_nodes = [n for n in self.root.children.values() if n.N == max_value]
-        best_child = random.choice(max_nodes)
-        print("max_value:" + str(max_value))
-        print(best_child.N)
-
-        return best_child.move
-
-    def move(self, move):
-        if move in self.root.children:
-            self.root_state.move(move)
-            self.root = self.root.children[move]
-            return
-
-        self.root_state.move(move)
-        self.root = Node(None, None)
-
-    def statistics(self) -> tuple:
-        return self.num_rollouts, self.run_time
-
-
-
 def print_board(board):
     print(np.flip(board, 0))
 
@@ -259,7 +69,6 @@ def draw_board(board):
 
 #board = create_board()
 connect_state = ConnectState()
-mcts = MCTS(connect_state)
 #print(board)
 
 game_over = False
@@ -283,11 +92,21 @@ myfont = pygame.font.SysFont("monospace", 75)
 turn = random.randint(PLAYER,AI)
 #turn = PLAYER
 connect_state.to_play = turn
+# Created after to_play is set so the search tree knows who moves first
+telemetry = TelemetrySink(TELEMETRY_PATH)
+mcts = MCTS(connect_state, book=load_book(), telemetry=telemetry)
+if turn == PLAYER:
+    mcts.start_pondering()
 
 while not game_over:
+    if turn == PLAYER:
+        # Leaves the interpreter to the pondering thread between event polls
+        pygame.time.wait(PONDER_POLL_MS)
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            mcts.close()
+            telemetry.close()
             sys.exit()
 
         if event.type == pygame.MOUSEMOTION:
@@ -307,7 +126,7 @@ while not game_over:
                 if connect_state.is_valid_location(col):
                     #row = connect_state.get_next_open_row(col)
                     connect_state.move(col)
-                    mcts.move(col)
+                    mcts.move(col)  # stops pondering and keeps the pondered subtree
 
 
 
@@ -326,9 +145,7 @@ while not game_over:
 
     if turn == AI and not game_over:
         mcts.search(1)
-        num_rollouts, run_time = mcts.statistics()
-        print("Statistics: ", num_rollouts, "rollouts in", run_time, "seconds")
-        col = mcts.best_move()
+        col = mcts.best_move()  # logs rollouts, pondered rollouts and timings to TELEMETRY_PATH
         #col = random.randint(0,COLUMN_COUNT-1)
         # col = int(input("Player 2 make your selection (0-6): "))
         if connect_state.is_valid_location(col):
@@ -350,6 +167,11 @@ while not game_over:
             turn += 1
             turn = turn % 2
 
+            if not game_over:
+                mcts.start_pondering()
+
 
     if(game_over):
+        mcts.close()
+        telemetry.close()
         pygame.time.wait(3000)
@@ -0,0 +1,54 @@
+import numpy as np
+
+from connect_state import ROW_COUNT, COLUMN_COUNT, PLAYER, AI, H1, PLAYER_WIN, AI_WIN
+
+# K random playouts from one position at once. Every game is a pair of uint64
+# bitboards (stones of the side to move, all stones) in the ConnectState layout.
+# All games start from the same position and move in lockstep, so at each step
+# the same player is to move in every unfinished game.
+
+BOTTOM = np.array([1 << (c * H1) for c in range(COLUMN_COUNT)], dtype=np.uint64)
+TOP = np.array([1 << (ROW_COUNT - 1 + c * H1) for c in range(COLUMN_COUNT)], dtype=np.uint64)
+COLUMN = np.array([((1 << ROW_COUNT) - 1) << (c * H1) for c in range(COLUMN_COUNT)], dtype=np.uint64)
+SHIFTS = [np.uint64(s) for s in (1, H1, H1 - 1, H1 + 1)]
+ZERO = np.uint64(0)
+
+
+def has_four(bitboards):
+    # Vectorised connect_state.has_four over an array of bitboards
+    won = np.zeros(bitboards.shape, dtype=bool)
+    for shift in SHIFTS:
+        m = bitboards & (bitboards >> shift)
+        won |= (m & (m >> (shift + shift))) != ZERO
+    return won
+
+
+def batch_roll_out(state, k, rng):
+    # Plays k random games from state to the end and returns (player wins, AI wins, draws)
+    if state.is_terminal_node():
+        outcome = state.get_outcome()
+        return (k if outcome == PLAYER_WIN else 0, k if outcome == AI_WIN else 0,
+                k if outcome not in (PLAYER_WIN, AI_WIN) else 0)
+
+    to_play = AI if state.to_play == AI else PLAYER
+    current = np.full(k, state.bitboards[to_play], dtype=np.uint64)
+    mask = np.full(k, state.bitboards[PLAYER] | state.bitboards[AI], dtype=np.uint64)
+    wins = [0, 0]   # by PLAYER / AI
+
+    while current.size:
+        legal = (mask[:, None] & TOP) == ZERO
+        # a uniform random legal column per game: the largest random key among legal columns
+        cols = np.argmax(rng.random((current.size, COLUMN_COUNT)) * legal, axis=1)
+        move = (mask + BOTTOM[cols]) & COLUMN[cols]
+        mover = current | move
+        mask = mask | move
+
+        won = has_four(mover)
+        wins[to_play] += int(np.count_nonzero(won))
+        # games that neither side won and that still have room continue
+        alive = ~won & ((mask[:, None] & TOP) == ZERO).any(axis=1)
+        current = (mover ^ mask)[alive]
+        mask = mask[alive]
+        to_play = AI if to_play == PLAYER else PLAYER
+
+    return wins[PLAYER], wins[AI], k - wins[PLAYER] - wins[AI]
@@ -0,0 +1,141 @@
+import numpy as np
+
+ROW_COUNT = 6
+COLUMN_COUNT = 7
+
+PLAYER = 0
+AI = 1
+
+EMPTY = 0
+PLAYER_PIECE = 1
+AI_PIECE = 2
+
+PLAYER_WIN = 1
+AI_WIN = 2
+DRAW = 3
+
+# Bitboard layout: one bit per cell, column-major, bit index = col * H1 + row.
+# Every column carries an extra sentinel bit on top so that shifts never wrap
+# a line from the top of one column into the bottom of the next.
+H1 = ROW_COUNT + 1
+CELL_COUNT = ROW_COUNT * COLUMN_COUNT
+
+
+def has_four(bitboard):
+    # Vertical, horizontal, and both diagonals in one shift/and pass each
+    for shift in (1, H1, H1 - 1, H1 + 1):
+        m = bitboard & (bitboard >> shift)
+        if m & (m >> (2 * shift)):
+            return True
+    return False
+
+
+class ConnectState:
+    def __init__(self):
+        self.bitboards = [0, 0]     # indexed by PLAYER / AI
+        self.heights = [0] * COLUMN_COUNT   # next open row in each column
+        self.moves = 0
+        self.to_play = -1
+        self.last_move = None       # column of the latest drop
+        self.winner = EMPTY         # cached result of the last-move win check
+        self.history = []           # (col, player, to_play, winner) per move, for undo
+
+    @property
+    def board(self):
+        # 6x7 array view for printing and drawing, built on demand
+        board = np.zeros((ROW_COUNT, COLUMN_COUNT))
+        player_bb, ai_bb = self.bitboards
+        for c in range(COLUMN_COUNT):
+            for r in range(self.heights[c]):
+                bit = 1 << (c * H1 + r)
+                if player_bb & bit:
+                    board[r][c] = PLAYER_PIECE
+                elif ai_bb & bit:
+                    board[r][c] = AI_PIECE
+        return board
+
+    def create_board(self):
+        self.bitboards = [0, 0]
+        self.heights = [0] * COLUMN_COUNT
+        self.moves = 0
+        self.last_move = None
+        self.winner = EMPTY
+        self.history = []
+        return self.board
+
+    def copy(self):
+        # Fixed-size copy of the position; the undo history is not carried over
+        state = ConnectState.__new__(ConnectState)
+        state.bitboards = self.bitboards[:]
+        state.heights = self.heights[:]
+        state.moves = self.moves
+        state.to_play = self.to_play
+        state.last_move = self.last_move
+        state.winner = self.winner
+        state.history = []
+        return state
+
+    def drop_piece(self, row, col, piece):
+        # Drop a piece in the specified row and column
+        self.history.append((col, piece - 1, self.to_play, self.winner))
+        self.bitboards[piece - 1] |= 1 << (col * H1 + row)
+        self.heights[col] = row + 1
+        self.moves += 1
+        self.record_move(col, piece - 1)
+        return self.board
+
+    def is_valid_location(self, col):
+        # Check if the top row in the specified column is empty
+        return self.heights[col] < ROW_COUNT
+
+    def get_next_open_row(self, col):
+        # Find the lowest empty row in the specified column
+        row = self.heights[col]
+        return row if row < ROW_COUNT else -1
+
+    def move(self, col):
+        row = self.heights[col]
+        player = AI if self.to_play == AI else PLAYER
+        self.history.append((col, player, self.to_play, self.winner))
+        self.bitboards[player] |= 1 << (col * H1 + row)
+        self.heights[col] = row + 1
+        self.moves += 1
+        self.record_move(col, player)
+        self.to_play = AI if self.to_play == PLAYER else PLAYER
+
+    play = move
+
+    def undo(self):
+        # Take back the latest move played on this state
+        col, player, to_play, winner = self.history.pop()
+        row = self.heights[col] - 1
+        self.bitboards[player] ^= 1 << (col * H1 + row)
+        self.heights[col] = row
+        self.moves -= 1
+        self.to_play = to_play
+        self.winner = winner
+        self.last_move = self.history[-1][0] if self.history else None
+
+    def record_move(self, col, player):
+        # Only the player who just moved can have completed a four
+        self.last_move = col
+        if self.winner == EMPTY and has_four(self.bitboards[player]):
+            self.winner = player + 1
+
+    def winning_move(self, piece):
+        # Check if the specified piece has won the game
+        return self.winner == piece
+
+    def is_terminal_node(self):  # Game over
+        return self.winner != EMPTY or self.moves == CELL_COUNT
+
+    def get_valid_locations(self):  # Get all the columns that could drop pieces
+        return [col for col in range(COLUMN_COUNT) if self.heights[col] < ROW_COUNT]
+
+    def get_outcome(self):
+        if self.winner == PLAYER_PIECE:
+            return PLAYER_WIN
+        elif self.winner == AI_PIECE:
+            return AI_WIN
+        else:
+            return DRAW
@@ -0,0 +1,138 @@
+import numpy as np
+
+from board import ROW_COUNT, COLUMN_COUNT, EMPTY, PLAYER_PIECE, AI_PIECE
+from transposition import ZOBRIST, ZOBRIST_BASE
+
+WINDOW_LENGTH = 4
+
+
+def evaluate_window(window, piece):
+    opp_piece = PLAYER_PIECE
+    if piece == PLAYER_PIECE:
+        opp_piece = AI_PIECE
+    score = 0
+    if window.count(piece) == 4:
+        score += 100
+    elif window.count(piece) == 3 and window.count(EMPTY) == 1:
+        score += 5
+    elif window.count(piece) == 2 and window.count(EMPTY) == 2:
+        score += 2
+
+    if window.count(opp_piece) == 3 and window.count(EMPTY) == 1:
+        score -= 40
+
+    return score
+
+
+def build_windows():
+    # Flat (row * COLUMN_COUNT + col) indices of the 69 windows of four cells
+    windows = []
+    for r in range(ROW_COUNT):    #horizontal
+        for c in range(COLUMN_COUNT - 3):
+            windows.append([r * COLUMN_COUNT + c + i for i in range(WINDOW_LENGTH)])
+    for c in range(COLUMN_COUNT):   #vertical
+        for r in range(ROW_COUNT - 3):
+            windows.append([(r + i) * COLUMN_COUNT + c for i in range(WINDOW_LENGTH)])
+    for r in range(ROW_COUNT - 3):    #diagnol
+        for c in range(COLUMN_COUNT - 3):
+            windows.append([(r + i) * COLUMN_COUNT + c + i for i in range(WINDOW_LENGTH)])
+    for r in range(ROW_COUNT - 3):    #negative diagnol
+        for c in range(COLUMN_COUNT - 3):
+            windows.append([(r + 3 - i) * COLUMN_COUNT + c + i for i in range(WINDOW_LENGTH)])
+    return np.array(windows, dtype=np.intp)
+
+
+def build_window_scores():
+    # WINDOW_SCORES[own][opp] is evaluate_window() of a window holding own pieces of
+    # the scoring side, opp pieces of the other side and empty cells elsewhere
+    scores = np.zeros((WINDOW_LENGTH + 1, WINDOW_LENGTH + 1), dtype=np.int64)
+    for own in range(WINDOW_LENGTH + 1):
+        for opp in range(WINDOW_LENGTH + 1 - own):
+            window = [AI_PIECE] * own + [PLAYER_PIECE] * opp + [EMPTY] * (WINDOW_LENGTH - own - opp)
+            scores[own][opp] = evaluate_window(window, AI_PIECE)
+    return scores
+
+
+WINDOWS = build_windows()
+WINDOW_SCORES = build_window_scores()
+
+
+def score_position(board, piece):
+    opp_piece = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
+
+    #center
+    score = int(np.count_nonzero(board[:, COLUMN_COUNT // 2] == piece)) * 6
+
+    # gather every window at once and look up its score from the piece counts
+    cells = board.ravel()[WINDOWS]
+    own = np.count_nonzero(cells == piece, axis=1)
+    opp = np.count_nonzero(cells == opp_piece, axis=1)
+    score += int(WINDOW_SCORES[own, opp].sum())
+
+    return score
+
+
+# Window ids passing through each flat cell (at most 13 per cell)
+CELL_WINDOWS = [[w for w in range(len(WINDOWS)) if cell in WINDOWS[w]] for cell in range(ROW_COUNT * COLUMN_COUNT)]
+SCORE_TABLE = WINDOW_SCORES.tolist()
+CENTER_COLUMN = COLUMN_COUNT // 2
+
+
+class Evaluator:
+    # Running score_position() for both sides, kept in step with a board through
+    # drop()/undo() so a leaf costs a lookup instead of a full rescore
+    def __init__(self, board):
+        self.counts = [None, [0] * len(WINDOWS), [0] * len(WINDOWS)]   # per piece, per window
+        self.scores = [0, 0, 0]     # score_position(board, piece) by piece
+        self.fours = [0, 0, 0]      # completed windows by piece
+        self.pieces = 0
+        self.key = ZOBRIST_BASE     # Zobrist hash of the board
+        for r in range(ROW_COUNT):
+            for c in range(COLUMN_COUNT):
+                if board[r][c] != EMPTY:
+                    self.drop(r, c, int(board[r][c]))
+
+    def drop(self, row, col, piece):
+        own_counts = self.counts[piece]
+        opp = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
+        opp_counts = self.counts[opp]
+        own_delta = 0
+        opp_delta = 0
+        for w in CELL_WINDOWS[row * COLUMN_COUNT + col]:
+            own = own_counts[w]
+            other = opp_counts[w]
+            own_delta += SCORE_TABLE[own + 1][other] - SCORE_TABLE[own][other]
+            opp_delta += SCORE_TABLE[other][own + 1] - SCORE_TABLE[other][own]
+            own_counts[w] = own + 1
+            if own == 3:
+                self.fours[piece] += 1
+        if col == CENTER_COLUMN:
+            own_delta += 6
+        self.scores[piece] += own_delta
+        self.scores[opp] += opp_delta
+        self.pieces += 1
+        self.key ^= ZOBRIST[piece][row * COLUMN_COUNT + col]
+
+    def undo(self, row, col, piece):
+        own_counts = self.counts[piece]
+        opp = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
+        opp_counts = self.counts[opp]
+        own_delta = 0
+        opp_delta = 0
+        for w in CELL_WINDOWS[row * COLUMN_COUNT + col]:
+            own = own_counts[w]
+            other = opp_counts[w]
+            own_delta += SCORE_TABLE[own - 1][other] - SCORE_TABLE[own][other]
+            opp_delta += SCORE_TABLE[other][own - 1] - SCORE_TABLE[other][own]
+            own_counts[w] = own - 1
+            if own == 4:
+                self.fours[piece] -= 1
+        if col == CENTER_COLUMN:
+            own_delta -= 6
+        self.scores[piece] += own_delta
+        self.scores[opp] += opp_delta
+        self.pieces -= 1
+        self.key ^= ZOBRIST[piece][row * COLUMN_COUNT + col]
+
+    def score(self, piece):
+        return self.scores[piece]
@@ -2,9 +2,17 @@ import random
 import sys
 import math
 
-import numpy as np
 import pygame
 
+from board import (create_board, drop_piece, is_valid_location, get_next_open_row, print_board,
+                   winning_move_at)
+from minimax import iterative_deepening
+from transposition import TranspositionTable
+from move_ordering import MoveOrderer
+from solver import perfect_move
+from opening_book import load_book
+from telemetry import TelemetrySink
+
 ROW_COUNT = 6
 COLUMN_COUNT = 7
 
@@ -15,233 +23,17 @@ EMPTY = 0
 PLAYER_PIECE = 1
 AI_PIECE = 2
 
-WINDOW_LENGTH = 4
-
 BLUE = (55, 226, 213)
 BLACK = (89, 6, 150)
 RED =  (199, 10, 128)
 YELLOW = (251, 203, 10)
 
-def create_board():
-    board = np.zeros((ROW_COUNT, COLUMN_COUNT))
-    return board
-
-def drop_piece(board, row, col, piece):
-    board[row][col] = piece
-    return board
-
-def is_valid_location(board, col):
-    return board[ROW_COUNT-1][col] == 0
-
-def get_next_open_row(board, col):
-    for r in range(ROW_COUNT):
-        if board[r][col] == 0:
-            return r
-
-def print_board(board):
-    print(np.flip(board, 0))
-
-def winning_move(board, piece):
-    #check horizontal
-    for c in range(COLUMN_COUNT - 3):
-        for r in range(ROW_COUNT):
-            if board[r][c] == piece and board[r][c+1] == piece and board[r][c+2] == piece and board[r][c+3] == piece:
-                return True
-
-    #check vertical
-    for c in range(COLUMN_COUNT):
-        for r in range(ROW_COUNT - 3):
-            if board[r][c] == piece and board[r+1][c] == piece and board[r+2][c] == piece and board[r+3][c] == piece:
-                return True
-
-    #check positively sloped diaganols
-    for c in range(COLUMN_COUNT - 3):
-        for r in range(ROW_COUNT - 3):
-            if board[r][c] == piece and board[r+1][c+1] == piece and board[r+2][c+2] == piece and board[r+3][c+3] == piece:
-                return True
-
-    #check negatively sloped diaganols
-    for c in range(COLUMN_COUNT - 3):
-        for r in range(3, ROW_COUNT):
-            if board[r][c] == piece and board[r-1][c+1] == piece and board[r-2][c+2] == piece and board[r-3][c+3] == piece:
-                return True
-
-
-def evaluate_window(window, piece):
-    opp_piece = PLAYER_PIECE
-    if piece == PLAYER_PIECE:
-        opp_piece = AI_PIECE
-    score = 0
-    if window.count(piece) == 4:
-        score += 100
-    elif window.count(piece) == 3 and window.count(EMPTY) == 1:
-        score += 5
-    elif window.count(piece) == 2 and window.count(EMPTY) == 2:
-        score += 2
-
-    if window.count(opp_piece) == 3 and window.count(EMPTY) == 1:
-        score -= 40
-
-    return score
-
-
-def score_position(board,piece):
-    score = 0
-
-    #center
-    center_array = [int(i) for i in list(board[:,COLUMN_COUNT//2])]
-    center_count = center_array.count(piece)
-    score += center_count * 6
-
-    #horizontal
-    for r in range(ROW_COUNT):
-        row_array = [int(i) for i in list(board[r, :])]
-        for c in range(COLUMN_COUNT - 3):
-            window = row_array[c:c + WINDOW_LENGTH]
-            score += evaluate_window(window, piece)
-
-    #vertical
-    for c in range(COLUMN_COUNT):
-        col_array = [int(i) for i in list(board[:,c])]
-        for r in range(ROW_COUNT -3):
-            window = col_array[r:r + WINDOW_LENGTH]
-            score += evaluate_window(window, piece)
-
-    #diagnol
-    for r in range(ROW_COUNT-3):
-        for c in range(COLUMN_COUNT-3):
-            window = [board[r+i][c+i] for i in range(WINDOW_LENGTH)]
-            score += evaluate_window(window, piece)
-
-    #negative diagnol
-    for r in range(ROW_COUNT-3):
-        for c in range(COLUMN_COUNT-3):
-            window = [board[r+3-i][c+i] for i in range(WINDOW_LENGTH)]  #row + 3: 因为是负向检测，不能从最底部的row开始检测
-            score += evaluate_window(window, piece)
-
-    return score
-
-
-def is_ternimal_node(board):
-    return winning_move(board, PLAYER_PIECE) or winning_move(board, AI_PIECE) or len(get_valid_location(board))==0
-
-
-def minimax(board, depth, maximizingPlayer):
-    valid_locations = get_valid_location(board)
-    is_terminal = is_ternimal_node(board)
-
-    if depth == 0 or is_terminal:
-        if is_terminal:
-            if winning_move(board, AI_PIECE):
-                return None, 100000
-            elif winning_move(board, PLAYER_PIECE):
-                return None, -100000
-            else:
-                return None, 0
-        else: #depth = 0
-            return None, score_position(board, AI_PIECE)
-
-    if maximizingPlayer:
-        value = -math.inf
-        column = random.choice(valid_locations)
-        for col in valid_locations:
-            row = get_next_open_row(board, col)
-            b_copy = board.copy()
-            drop_piece(b_copy, row, col, AI_PIECE)
-            new_score = minimax(b_copy, depth-1, False)[1]
-            if new_score > value:
-                value = new_score
-                column = col  #得到产生best score的column
-
-        return column, value
-    else:
-        value = math.inf
-        column = random.choice(valid_locations)
-        for col in valid_locations:
-            row = get_next_open_row(board, col)
-            b_copy = board.copy()
-            drop_piece(b_copy, row, col, PLAYER_PIECE)
-            new_score = minimax(b_copy, depth-1, True)[1]
-            if new_score < value:
-                value = new_score
-                column = col
-        return column, value
-
-
-def minimax_ab(board, depth, maximizingPlayer, alpha, beta):
-    valid_locations = get_valid_location(board)
-    is_terminal = is_ternimal_node(board)
-
-    if depth == 0 or is_terminal:
-        if is_terminal:
-            if winning_move(board, AI_PIECE):
-                return None, 100000
-            elif winning_move(board, PLAYER_PIECE):
-                return None, -100000
-            else:
-                return None, 0
-        else: #depth = 0
-            return None, score_position(board, AI_PIECE)
-
-    if maximizingPlayer:
-        value = -math.inf
-        column = random.choice(valid_locations)
-        for col in valid_locations:
-            row = get_next_open_row(board, col)
-            b_copy = board.copy()
-            drop_piece(b_copy, row, col, AI_PIECE)
-            new_score = minimax(b_copy, depth-1, False)[1]
-            if new_score > value:
-                value = new_score
-                column = col  #得到产生best score的column
-            alpha = max(alpha,value)
-            if alpha>= beta:
-                break
-        return column, value
-
-    else:
-        value = math.inf
-        column = random.choice(valid_locations)
-        for col in valid_locations:
-            row = get_next_open_row(board, col)
-            b_copy = board.copy()
-            drop_piece(b_copy, row, col, PLAYER_PIECE)
-            new_score = minimax(b_copy, depth-1, True)[1]
-            if new_score < value:
-                value = new_score
-                column = col
-            beta = min(beta,value)
-            if alpha >= beta:
-                break
-        return column, value
-
-
-def get_valid_location(board):   #get all the cols that could drop pieces
-    valid_locations = []
-    for col in range(COLUMN_COUNT):
-        if is_valid_location(board, col):
-            valid_locations.append(col)
-    return valid_locations
-
-def pick_last_move(board, piece):
-
-    valid_locations = get_valid_location(board)
-    best_score = -10000
-    best_col = random.choice(valid_locations)
-
-    for col in valid_locations:
-        row = get_next_open_row(board,col)
-        temp_board = board.copy()
-        drop_piece(temp_board, row, col, piece)
-        score = score_position(temp_board, piece)
-
-        if score > best_score:
-            best_score = score
-            best_col = col
-
-    return  best_col
-
+TT_BYTES = 16 * 1024 * 1024
+AI_TIME_LIMIT = 1     # seconds of search per AI move
 
+DIFFICULTY = "normal"     # "perfect" plays solver moves
+SOLVER_TIME_LIMIT = 5     # seconds the solver gets before falling back to the heuristic search
+TELEMETRY_PATH = "minimax_telemetry.jsonl"    # one JSON record per AI move
 
 def draw_board(board):
     for c in range(COLUMN_COUNT):
@@ -266,6 +58,11 @@ def draw_board(board):
 
 
 board = create_board()
+# Kept for the whole game so later moves reuse earlier searches and ordering
+table = TranspositionTable(TT_BYTES)
+orderer = MoveOrderer()
+book = load_book()     # None until opening_book.py has been run
+telemetry = TelemetrySink(TELEMETRY_PATH)
 #print(board)
 
 game_over = False
@@ -292,6 +89,7 @@ while not game_over:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            telemetry.close()
             sys.exit()
 
         if event.type == pygame.MOUSEMOTION:
@@ -313,7 +111,7 @@ while not game_over:
                     row = get_next_open_row(board, col)
                     board = drop_piece(board, row, col, PLAYER_PIECE)
 
-                    if winning_move(board, PLAYER_PIECE):
+                    if winning_move_at(board, row, col):
                         label = myfont.render("Player 1 win", 1, RED)
                         screen.blit(label, (40,10))
                         print("Player 1 win")
@@ -327,7 +125,13 @@ while not game_over:
 
 
     if turn == AI and not game_over:
-        col, minimax_score = minimax_ab(board, 3, True, -math.inf, math.inf)
+        col = None
+        if DIFFICULTY == "perfect":
+            col, minimax_score = perfect_move(board, AI_PIECE, SOLVER_TIME_LIMIT, book=book, telemetry=telemetry)
+        if col is None:     # normal difficulty, or an early position the solver could not finish
+            col, minimax_score, depth = iterative_deepening(board, AI_TIME_LIMIT, table=table, orderer=orderer,
+                                                            book=book, telemetry=telemetry)
+        #col, minimax_score = minimax_ab(board, 5, True, -math.inf, math.inf, table=table)
         #col, minimax_score = minimax(board,3,True)
         #col = pick_last_move(board, AI_PIECE)
         #col = random.randint(0,COLUMN_COUNT-1)
@@ -337,7 +141,7 @@ while not game_over:
             row = get_next_open_row(board, col)
             board = drop_piece(board, row, col, AI_PIECE)
 
-            if winning_move(board, AI_PIECE):
+            if winning_move_at(board, row, col):
                 label = myfont.render("Player 2 win", 1, YELLOW)
                 screen.blit(label, (40, 10))
                 print("Player 2 win")
@@ -350,4 +154,5 @@ while not game_over:
             turn = turn % 2
 
     if(game_over):
+        telemetry.close()
         pygame.time.wait(3000)
@@ -0,0 +1,293 @@
+import argparse
+import math
+import random
+import time
+import multiprocessing
+
+from connect_state import ConnectState, PLAYER, AI, PLAYER_PIECE, AI_PIECE, PLAYER_WIN, AI_WIN
+from minimax import minimax, minimax_ab, iterative_deepening, SearchStats
+from transposition import TranspositionTable
+from move_ordering import MoveOrderer
+from solver import perfect_move, board_key
+from mcts_engine import MCTS
+from opening_book import load_book
+from telemetry import TelemetrySink, decision_record, board_moves
+
+# Plays engines against each other without pygame, for benchmarks on machines with no display.
+# Engine specs: random, minimax:<depth>, minimax_ab:<depth>, id:<seconds>, solver:<seconds>,
+# mcts:<seconds>, mcts_rave:<seconds>
+
+TT_BYTES = 16 * 1024 * 1024
+
+
+def ai_board(state, piece):
+    # The minimax engines always maximise for AI_PIECE, so the PLAYER_PIECE side
+    # searches a copy with the colours swapped
+    board = state.board
+    if piece == PLAYER_PIECE:
+        board = (3 - board) * (board != 0)
+    return board
+
+
+class RandomEngine:
+    def start(self, state, piece):
+        pass
+
+    def choose(self, state):
+        return random.choice(state.get_valid_locations())
+
+    def observe(self, col):
+        pass
+
+
+class MinimaxEngine:
+    def __init__(self, depth, alpha_beta, book=None, telemetry=None):
+        self.depth = depth
+        self.alpha_beta = alpha_beta
+        self.book = book
+        self.telemetry = telemetry
+        self.stats = SearchStats()
+
+    def start(self, state, piece):
+        self.piece = piece
+
+    def choose(self, state):
+        board = ai_board(state, self.piece)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        nodes_start = self.stats.nodes
+        if self.alpha_beta:
+            col, score = minimax_ab(board, self.depth, True, -math.inf, math.inf, stats=self.stats, book=self.book)
+        else:
+            col, score = minimax(board, self.depth, True, stats=self.stats)
+        if self.telemetry is not None:
+            engine = "minimax_ab" if self.alpha_beta else "minimax"
+            self.telemetry.write(decision_record(engine, board_key(board), board_moves(board), None, wall_start,
+                                                 cpu_start, col, score=score, depth=self.depth,
+                                                 nodes=self.stats.nodes - nodes_start))
+        return col
+
+    def observe(self, col):
+        pass
+
+
+class IterativeEngine:
+    def __init__(self, time_limit, book=None, solve=False, telemetry=None):
+        # solve tries the exact solver first, as the "perfect" difficulty in main.py does
+        self.time_limit = time_limit
+        self.book = book
+        self.solve = solve
+        self.telemetry = telemetry
+        self.stats = SearchStats()
+
+    def start(self, state, piece):
+        self.piece = piece
+        self.table = TranspositionTable(TT_BYTES)
+        self.orderer = MoveOrderer()
+
+    def choose(self, state):
+        board = ai_board(state, self.piece)
+        col = None
+        if self.solve:
+            col, _ = perfect_move(board, AI_PIECE, self.time_limit, book=self.book, telemetry=self.telemetry)
+        if col is None:
+            col, _, _ = iterative_deepening(board, self.time_limit, table=self.table, stats=self.stats,
+                                            orderer=self.orderer, book=self.book, telemetry=self.telemetry)
+        return col
+
+    def observe(self, col):
+        pass
+
+
+class MCTSEngine:
+    def __init__(self, time_limit, book=None, rave=False, telemetry=None):
+        self.time_limit = time_limit
+        self.book = book
+        self.rave = rave
+        self.telemetry = telemetry
+        self.rollouts = 0
+
+    def start(self, state, piece):
+        # state.to_play is already set, so the tree knows who moves first
+        self.mcts = MCTS(state, book=self.book, rave=self.rave, telemetry=self.telemetry)
+
+    def choose(self, state):
+        self.mcts.search(self.time_limit)
+        self.rollouts += self.mcts.statistics()[0]
+        return self.mcts.best_move()
+
+    def observe(self, col):
+        self.mcts.move(col)
+
+
+def make_engine(spec, book=None, telemetry=None):
+    name, _, arg = spec.partition(":")
+    if name == "random":
+        return RandomEngine()
+    if name == "minimax":
+        return MinimaxEngine(int(arg or 4), False, telemetry=telemetry)
+    if name == "minimax_ab":
+        return MinimaxEngine(int(arg or 5), True, book, telemetry)
+    if name == "id":
+        return IterativeEngine(float(arg or 1), book, telemetry=telemetry)
+    if name == "solver":
+        return IterativeEngine(float(arg or 5), book, solve=True, telemetry=telemetry)
+    if name == "mcts":
+        return MCTSEngine(float(arg or 1), book, telemetry=telemetry)
+    if name == "mcts_rave":
+        return MCTSEngine(float(arg or 1), book, rave=True, telemetry=telemetry)
+    raise ValueError("unknown engine: " + spec)
+
+
+def play_game(engines, first, seed, telemetry=None):
+    # engines[0] plays PLAYER_PIECE and engines[1] AI_PIECE; first is PLAYER or AI.
+    # Returns (outcome, moves, think time per engine, moves per engine). telemetry is the
+    # in-memory sink the engines write to; each new record is tagged with the side that moved.
+    random.seed(seed)
+    state = ConnectState()
+    state.to_play = first
+    pieces = (PLAYER_PIECE, AI_PIECE)
+    for engine, piece in zip(engines, pieces):
+        engine.start(state, piece)
+
+    think = [0.0, 0.0]
+    move_counts = [0, 0]
+    while not state.is_terminal_node():
+        side = PLAYER if state.to_play == PLAYER else AI
+        start_time = time.perf_counter()
+        logged = len(telemetry.records) if telemetry is not None else 0
+        col = engines[side].choose(state)
+        think[side] += time.perf_counter() - start_time
+        move_counts[side] += 1
+        if telemetry is not None:
+            for record in telemetry.records[logged:]:
+                record["side"] = side
+        if col is None or not state.is_valid_location(col):
+            col = random.choice(state.get_valid_locations())
+        state.move(col)
+        for engine in engines:
+            engine.observe(col)
+
+    return state.get_outcome(), state.moves, think, move_counts
+
+
+def game_worker(args):
+    # Plays game index with fresh engines, in a pool process or inline. The game depends
+    # only on its arguments, so a pool run reproduces the serial one.
+    spec_a, spec_b, index, seed, book_path, log = args
+    book = load_book(book_path) if book_path is not None else None
+    telemetry = TelemetrySink() if log else None
+    engines = [make_engine(spec_a, book, telemetry), make_engine(spec_b, book, telemetry)]
+    first = PLAYER if index % 2 == 0 else AI
+    start_time = time.perf_counter()
+    outcome, moves, think, move_counts = play_game(engines, first, seed + index, telemetry)
+    return {
+        "index": index,
+        "outcome": outcome,
+        "moves": moves,
+        "think_time": think,
+        "move_counts": move_counts,
+        "game_time": time.perf_counter() - start_time,
+        "search_stats": [getattr(engine, "stats", None) for engine in engines],
+        "rollouts": [getattr(engine, "rollouts", None) for engine in engines],
+        "telemetry": telemetry.records if telemetry is not None else [],
+    }
+
+
+def run_match(spec_a, spec_b, games, seed=0, book=None, verbose=False, workers=1, telemetry=None):
+    # spec_a takes PLAYER_PIECE and spec_b AI_PIECE; the first move alternates between them
+    # and game i is seeded with seed + i. With workers > 1 the games are spread over a
+    # process pool and reported as they finish; totals are summed in game order either way.
+    # telemetry is an optional TelemetrySink; every search decision is written to it in game
+    # order, tagged with the game index and the engine spec.
+    book_path = book.path if book is not None else None
+    jobs = [(spec_a, spec_b, i, seed, book_path, telemetry is not None) for i in range(games)]
+
+    start_time = time.perf_counter()
+    games_played = []
+    if workers > 1:
+        with multiprocessing.Pool(workers) as pool:
+            for game in pool.imap_unordered(game_worker, jobs):
+                games_played.append(game)
+                if verbose:
+                    print_game(game, spec_a, spec_b)
+    else:
+        for job in jobs:
+            game = game_worker(job)
+            games_played.append(game)
+            if verbose:
+                print_game(game, spec_a, spec_b)
+    games_played.sort(key=lambda game: game["index"])
+    wall_time = time.perf_counter() - start_time
+
+    results = {"engines": [spec_a, spec_b], "games": games, "wins": [0, 0], "draws": 0, "moves": 0,
+               "think_time": [0.0, 0.0], "move_counts": [0, 0], "game_time": 0.0,
+               "search_stats": [None, None], "rollouts": [None, None], "wall_time": wall_time}
+    for game in games_played:
+        if telemetry is not None:
+            for record in game["telemetry"]:
+                record["game"] = game["index"]
+                record["engine_spec"] = results["engines"][record.pop("side")]
+                telemetry.write(record)
+        outcome = game["outcome"]
+        if outcome == PLAYER_WIN:
+            results["wins"][0] += 1
+        elif outcome == AI_WIN:
+            results["wins"][1] += 1
+        else:
+            results["draws"] += 1
+        results["moves"] += game["moves"]
+        results["game_time"] += game["game_time"]
+        for side in (PLAYER, AI):
+            results["think_time"][side] += game["think_time"][side]
+            results["move_counts"][side] += game["move_counts"][side]
+            stats = game["search_stats"][side]
+            if stats is not None:
+                if results["search_stats"][side] is None:
+                    results["search_stats"][side] = SearchStats()
+                results["search_stats"][side].merge(stats)
+            rollouts = game["rollouts"][side]
+            if rollouts is not None:
+                results["rollouts"][side] = (results["rollouts"][side] or 0) + rollouts
+    return results
+
+
+def print_game(game, spec_a, spec_b):
+    winner = ["draw", spec_a, spec_b][game["outcome"] % 3]
+    print(f"game {game['index'] + 1}: {winner} in {game['moves']} moves")
+
+
+def print_results(results):
+    spec_a, spec_b = results["engines"]
+    games = results["games"]
+    print(f"{spec_a} vs {spec_b}: {results['wins'][0]} - {results['wins'][1]}, {results['draws']} draws "
+          f"in {games} games")
+    print(f"Average time for each game: {results['game_time'] / games:.2f} seconds, "
+          f"{results['wall_time']:.2f} seconds in all.")
+    for side, spec in enumerate(results["engines"]):
+        moves = results["move_counts"][side]
+        per_move = results["think_time"][side] / moves if moves else 0.0
+        print(f"{spec} thinking time: {results['think_time'][side]:.2f} seconds, {per_move * 1000:.1f} ms per move")
+        if results["search_stats"][side] is not None:
+            print(f"{spec} search totals: {results['search_stats'][side]}")
+        if results["rollouts"][side] is not None:
+            print(f"{spec} rollouts: {results['rollouts'][side]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play two engines against each other without a display")
+    parser.add_argument("engine_a", help="plays the red (PLAYER_PIECE) stones, e.g. random or minimax_ab:5")
+    parser.add_argument("engine_b", help="plays the yellow (AI_PIECE) stones, e.g. mcts:1")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0, help="game i is seeded with seed + i")
+    parser.add_argument("--book", action="store_true", help="let the engines use the opening book")
+    parser.add_argument("--verbose", action="store_true", help="print every game's result")
+    parser.add_argument("--workers", type=int, default=1, help="play this many games at once in a process pool")
+    parser.add_argument("--telemetry", help="write one JSON line per engine decision here (.gz to compress)")
+    args = parser.parse_args()
+    book = load_book() if args.book else None
+    telemetry = TelemetrySink(args.telemetry) if args.telemetry else None
+    results = run_match(args.engine_a, args.engine_b, args.games, args.seed, book, args.verbose, args.workers,
+                        telemetry)
+    if telemetry is not None:
+        telemetry.close()
+    print_results(results)
@@ -0,0 +1,734 @@
+import random
+import math
+import sys
+import time
+import multiprocessing
+import threading
+
+import numpy as np
+
+from connect_state import ConnectState, PLAYER, DRAW, COLUMN_COUNT, PLAYER_WIN, AI_WIN
+from batch_rollout import batch_roll_out
+from solver import state_key
+from telemetry import decision_record
+
+RECYCLE_RATIO = 0.75    # a full tree is pruned back to this fraction of its node budget
+
+# Node.outcome once the game under a node is decided, from the point of view of the
+# player who made node.move (the same side Q is credited to)
+UNPROVEN = -1
+PROVEN_LOSS = 0
+PROVEN_DRAW = 1
+PROVEN_WIN = 2
+
+# RAVE equivalence parameter: the AMAF estimate and the node's own average weigh the
+# same after about RAVE_K visits, beta = sqrt(RAVE_K / (3N + RAVE_K))
+RAVE_K = 50
+
+# sqrt(log n) and 1 / sqrt(n) for small visit counts, so UCT needs neither per child
+TABLE_SIZE = 4096
+SQRT_LOG = [0.0] + [math.sqrt(math.log(n)) for n in range(1, TABLE_SIZE)]
+INV_SQRT = [0.0] + [1 / math.sqrt(n) for n in range(1, TABLE_SIZE)]
+
+# Children of every leaf: shared and never written to, add_children gives a node its own dict
+NO_CHILDREN = {}
+
+
+class Node:
+    # Slots instead of a per-node __dict__; the tree is most of the engine's memory
+    __slots__ = ("move", "parent", "N", "Q", "children", "outcome", "virtual_loss", "amaf_n", "amaf_q")
+
+    def __init__(self, move, parent):
+        self.move = move
+        self.parent = parent
+        self.N = 0      #visit time
+        self.Q = 0      #rewards
+        self.children = NO_CHILDREN
+        self.outcome = UNPROVEN
+        self.virtual_loss = 0   # in-flight simulations through this node, counted as lost visits
+        self.amaf_n = None      # RAVE only: per column, simulations where the side to move here was
+        self.amaf_q = None      # first to drop into that column, and the rewards they earned
+
+    def add_children(self, children: dict) -> None:
+        if self.children is NO_CHILDREN:
+            self.children = {}
+        for child in children:
+            self.children[child.move] = child
+
+
+def node_bytes() -> float:
+    # Average size of a Node measured on a root expanded over every column: the object and, for
+    # the root, its children dict. Shared objects (ints, floats, moves, NO_CHILDREN) are not counted.
+    root = Node(None, None)
+    root.add_children([Node(col, root) for col in range(COLUMN_COUNT)])
+    nodes = [root] + list(root.children.values())
+    total = sum(sys.getsizeof(node) for node in nodes) + sys.getsizeof(root.children)
+    return total / len(nodes)
+
+
+NODE_BYTES = node_bytes()
+
+
+class SearchProfile:
+    # Per-phase counters and timers for one instrumented MCTS.search, see MCTS(instrument=True)
+    def __init__(self):
+        self.simulations = 0
+        self.rollouts = 0
+        self.expansions = 0
+        self.select_time = 0.0      # tree descent, expansion excluded
+        self.expand_time = 0.0
+        self.rollout_time = 0.0
+        self.backprop_time = 0.0
+        self.rewind_time = 0.0      # undoing the scratch state back to the root
+        self.selection_depth = 0    # summed over simulations
+        self.max_depth = 0
+        self.rollout_moves = 0      # summed over single rollouts, batches have no length
+        self.single_rollouts = 0
+        self.tree_nodes = 0
+        self.run_time = 0.0
+
+    def average_selection_depth(self):
+        return self.selection_depth / self.simulations if self.simulations else 0.0
+
+    def average_rollout_length(self):
+        return self.rollout_moves / self.single_rollouts if self.single_rollouts else 0.0
+
+    def simulations_per_second(self):
+        return self.simulations / self.run_time if self.run_time else 0.0
+
+    def __repr__(self):
+        return (f"simulations={self.simulations} select={self.select_time:.3f}s "
+                f"expand={self.expand_time:.3f}s rollout={self.rollout_time:.3f}s "
+                f"backprop={self.backprop_time:.3f}s rewind={self.rewind_time:.3f}s "
+                f"depth={self.average_selection_depth():.1f} max_depth={self.max_depth} "
+                f"rollout_length={self.average_rollout_length():.1f} tree_nodes={self.tree_nodes}")
+
+
+def root_worker(args):
+    # Runs in a pool process: grows an independent tree and returns its root statistics
+    state, time_limit, seed, node_budget = args
+    random.seed(seed)
+    mcts = MCTS(state, node_budget=node_budget)
+    mcts.search(time_limit)
+    children = {move: (child.N, child.Q, child.outcome) for move, child in mcts.root.children.items()}
+    return children, mcts.num_rollouts
+
+
+def rollout_worker(args):
+    # Plays rollout_batch random games from every leaf position of a chunk, in a pool process
+    # or inline, and returns (player wins, AI wins, draws) per leaf. Local generators keep
+    # the caller's random modules untouched.
+    states, rollout_batch, seed = args
+    if rollout_batch > 1:
+        rng = np.random.default_rng(seed)
+        return [batch_roll_out(state, rollout_batch, rng) for state in states]
+
+    rng = random.Random(seed)
+    results = []
+    for state in states:
+        while not state.is_terminal_node():
+            state.play(rng.choice(state.get_valid_locations()))
+        outcome = state.get_outcome()
+        results.append((int(outcome == PLAYER_WIN), int(outcome == AI_WIN), int(outcome == DRAW)))
+    return results
+
+
+class MCTS:
+    def __init__(self, state=ConnectState(), book=None, workers=1, batch_size=1, rollout_batch=1,
+                 node_budget=None, rave=False, lookup_tables=True, instrument=False, telemetry=None):
+        # book is an optional OpeningBook; positions it covers are answered without searching.
+        # batch_size > 1 searches tree-parallel: that many simulations descend the one tree
+        # under virtual loss, their leaves are rolled out together and then backpropagated.
+        # With workers > 1 the leaves go to a pool in one chunk per process, so the pool's
+        # overhead is paid per chunk rather than per playout; raise batch_size or
+        # rollout_batch to give each chunk more work.
+        # Otherwise workers > 1 searches root-parallel: each pool process grows its own tree
+        # from root_state and only the root children's visits and rewards are merged.
+        # rollout_batch > 1 plays that many vectorised random games from every selected leaf,
+        # in the serial and tree-parallel searches.
+        # node_budget caps the number of live nodes: once it is reached the least-visited
+        # subtrees are collapsed, and leaves are no longer expanded if that frees too little.
+        # rave blends All-Moves-As-First statistics into the children's values; it needs
+        # the moves of every playout, so it only applies to the serial one-rollout search.
+        # lookup_tables reads the UCT logs and square roots for small counts from tables.
+        # instrument times the search into a SearchProfile, see profile(). Serial searches and
+        # pondering are timed per simulation through separate methods, so the plain path
+        # carries no timing code; tree-parallel searches are timed per batch; root-parallel
+        # searches only report totals, their phases run in the workers.
+        # telemetry is an optional TelemetrySink that gets one record per best_move.
+        self.book = book
+        self.rollout_batch = rollout_batch
+        self.rng = np.random.default_rng(random.getrandbits(64))
+        self.batch_size = batch_size
+        self.root_state = state.copy()
+        self.root = Node(None, None)
+        self.run_time = 0
+        self.node_count = 1
+        self.peak_nodes = 1
+        self.recycled = 0
+        if node_budget is not None and node_budget < 1 + COLUMN_COUNT:
+            # the root and one full set of children must fit, or there is never a move to pick
+            raise ValueError(f"node_budget must be at least {1 + COLUMN_COUNT}")
+        self.node_budget = node_budget
+        self.rave = rave
+        self.lookup_tables = lookup_tables
+        self.num_rollouts = 0
+        self.workers = workers
+        self.pool = None
+        self.worker_rollouts = []
+        self.ponder_thread = None
+        self.ponder_stop = threading.Event()
+        self.ponder_rollouts = 0
+        self.instrument = instrument
+        self.telemetry = telemetry
+        self.time_limit = None
+        self.wall_start = self.cpu_start = 0.0
+        self.search_profile = None
+        if instrument:
+            self.expand = self.expand_instrumented
+
+    def select_node(self, state: ConnectState) -> Node:
+        # Descends from the root playing moves on state; the caller rewinds it afterwards
+        # Proven children are never entered, their value is already known
+        node = self.root
+
+        while len(node.children) != 0:
+            child = self.select_child(node)
+            if child is None:
+                return node
+            node = child
+            state.play(node.move)
+
+            if state.is_terminal_node():
+                self.prove_terminal(node, state)
+                return node
+            if node.N == 0:
+                return node
+
+        if self.expand(node, state):
+            node = random.choice(list(node.children.values()))
+            state.play(node.move)
+            if state.is_terminal_node():
+                self.prove_terminal(node, state)
+
+        return node
+
+    def select_child(self, node: Node, explore: float = math.sqrt(2)):
+        # UCT value (virtual loss counted as lost visits, RAVE blended in when enabled) for
+        # every unproven child in a single pass: the parent's log is taken once and ties are
+        # broken uniformly by reservoir sampling. None if all are proven.
+        parent_n = node.N + node.virtual_loss
+        if self.lookup_tables and parent_n < TABLE_SIZE:
+            c = explore * SQRT_LOG[parent_n]
+        else:
+            c = explore * math.sqrt(math.log(parent_n)) if parent_n else 0.0
+        amaf_n = node.amaf_n
+        amaf_q = node.amaf_q
+
+        best = None
+        best_value = float('-inf')
+        ties = 0
+        for child in node.children.values():
+            if child.outcome != UNPROVEN:
+                continue
+            n = child.N + child.virtual_loss
+            if n == 0:
+                value = float('inf')
+            else:
+                q = child.Q / n
+                if amaf_n is not None and amaf_n[child.move]:
+                    beta = math.sqrt(RAVE_K / (3 * n + RAVE_K))
+                    q = (1 - beta) * q + beta * amaf_q[child.move] / amaf_n[child.move]
+                if self.lookup_tables and n < TABLE_SIZE:
+                    value = q + c * INV_SQRT[n]
+                else:
+                    value = q + c / math.sqrt(n)
+
+            if value > best_value:
+                best = child
+                best_value = value
+                ties = 1
+            elif value == best_value:
+                ties += 1
+                if random.randrange(ties) == 0:
+                    best = child
+        return best
+
+    def prove_terminal(self, node: Node, state: ConnectState) -> None:
+        # Only the player who just moved can have won
+        node.outcome = PROVEN_DRAW if state.get_outcome() == DRAW else PROVEN_WIN
+        self.prove(node)
+
+    def prove(self, node: Node) -> None:
+        # Settles the ancestors that node's new outcome decides: a parent whose mover
+        # faces a winning reply is lost, and once every child is proven the parent's
+        # mover gets the opposite of the best reply
+        parent = node.parent
+        while parent is not None and parent.outcome == UNPROVEN:
+            outcomes = [child.outcome for child in parent.children.values()]
+            if PROVEN_WIN not in outcomes and UNPROVEN in outcomes:
+                return
+            parent.outcome = PROVEN_WIN - max(outcomes)
+            parent = parent.parent
+
+    def expand(self, parent: Node, state: ConnectState) -> bool:
+        if state.is_terminal_node():
+            return False
+
+        moves = state.get_valid_locations()
+        if self.node_budget is not None and self.node_count + len(moves) > self.node_budget:
+            self.recycle(parent)
+            if self.node_count + len(moves) > self.node_budget:
+                return False
+
+        children = [Node(move, parent) for move in moves]
+        parent.add_children(children)
+        if self.rave:
+            parent.amaf_n = [0] * COLUMN_COUNT
+            parent.amaf_q = [0.0] * COLUMN_COUNT
+        self.node_count += len(children)
+        self.peak_nodes = max(self.peak_nodes, self.node_count)
+
+        return True
+
+    def release(self, node: Node) -> int:
+        # Breaks the parent/child cycles under node so its memory is returned right away
+        # instead of waiting for the cyclic garbage collector; returns the nodes freed
+        freed = 0
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            stack.extend(n.children.values())
+            n.children = NO_CHILDREN
+            n.parent = None
+            freed += 1
+        return freed
+
+    def recycle(self, keep: Node) -> None:
+        # Collapses the least-visited expanded subtrees back into leaves. keep and its
+        # ancestors are on the current descent, nodes under virtual loss still have
+        # simulations in flight, and proven nodes need their children to pick the move
+        # once they become the root, so none of them is touched.
+        path = set()
+        while keep is not None:
+            path.add(keep)
+            keep = keep.parent
+
+        expanded = []
+        stack = [self.root]
+        while stack:
+            n = stack.pop()
+            if n.children:
+                if n not in path and n.virtual_loss == 0 and n.outcome == UNPROVEN:
+                    expanded.append(n)
+                stack.extend(n.children.values())
+        expanded.sort(key=lambda n: n.N)
+
+        target = int(self.node_budget * RECYCLE_RATIO)
+        for n in expanded:
+            if self.node_count <= target:
+                break
+            if n.children:
+                for child in n.children.values():
+                    self.node_count -= self.release(child)
+                n.children = NO_CHILDREN
+                self.recycled += 1
+
+    def roll_out(self, state: ConnectState) -> int:
+        while not state.is_terminal_node():
+            state.play(random.choice(state.get_valid_locations()))
+
+        return state.get_outcome()
+
+    def back_propagate(self, node: Node, turn: int, outcome: int) -> None:
+        # turn is the player to move at node, so node.move was made by the other one.
+        # PLAYER_WIN / AI_WIN are PLAYER + 1 / AI + 1.
+        if outcome == DRAW:
+            reward = 0.5
+        else:
+            reward = 0 if outcome == turn + 1 else 1
+
+        while node is not None:
+            node.N += 1
+            node.Q += reward
+            node = node.parent
+            reward = 1 - reward
+
+    def back_propagate_rave(self, node: Node, turn: int, outcome: int, moves: list) -> None:
+        # back_propagate plus AMAF updates. moves is the (col, player) of every move played
+        # since the root, tree moves first, and node sits after the first depth of them.
+        # Each node credits the columns its side to move was the first to drop into later on.
+        if outcome == DRAW:
+            reward = 0.5
+        else:
+            reward = 0 if outcome == turn + 1 else 1
+
+        depth = 0
+        parent = node.parent
+        while parent is not None:
+            depth += 1
+            parent = parent.parent
+        leaf_depth = depth
+
+        # who dropped first into each column from the current depth on; that stone fills
+        # the cell a move in that column from this node would take
+        first = [-1] * COLUMN_COUNT
+        for col, player in reversed(moves[depth:]):
+            first[col] = player
+
+        while node is not None:
+            node.N += 1
+            node.Q += reward
+            if node.amaf_n is not None:
+                mover = turn if (leaf_depth - depth) % 2 == 0 else 1 - turn
+                for col in range(COLUMN_COUNT):
+                    if first[col] == mover:
+                        node.amaf_n[col] += 1
+                        node.amaf_q[col] += 1 - reward
+            node = node.parent
+            reward = 1 - reward
+            depth -= 1
+            if depth >= 0:
+                col, player = moves[depth]
+                first[col] = player
+
+    def back_propagate_results(self, node: Node, turn: int, results: tuple) -> None:
+        # Credits a whole batch of rollouts, results = (player wins, AI wins, draws)
+        player_wins, ai_wins, draws = results
+        games = player_wins + ai_wins + draws
+        reward = (ai_wins if turn == PLAYER else player_wins) + 0.5 * draws
+
+        while node is not None:
+            node.N += games
+            node.Q += reward
+            node = node.parent
+            reward = games - reward
+
+    def book_move(self):
+        if self.book is None:
+            return None
+        hit = self.book.lookup_state(self.root_state)
+        return None if hit is None else hit[0]
+
+    def simulate(self, state: ConnectState, root_moves: int) -> int:
+        # One serial simulation on the scratch state, rewound to root_moves afterwards;
+        # returns the number of rollouts played
+        node = self.select_node(state)
+        turn = state.to_play
+        if self.rollout_batch > 1:
+            self.back_propagate_results(node, turn, batch_roll_out(state, self.rollout_batch, self.rng))
+            num_rollouts = self.rollout_batch
+        elif self.rave:
+            outcome = self.roll_out(state)
+            moves = [(col, player) for col, player, _, _ in state.history]
+            self.back_propagate_rave(node, turn, outcome, moves)
+            num_rollouts = 1
+        else:
+            outcome = self.roll_out(state)
+            self.back_propagate(node, turn, outcome)
+            num_rollouts = 1
+        while state.moves > root_moves:
+            state.undo()
+        return num_rollouts
+
+    def simulate_instrumented(self, state: ConnectState, root_moves: int) -> int:
+        # simulate with every phase timed into self.search_profile
+        profile = self.search_profile
+        expand_time = profile.expand_time
+        start = time.perf_counter()
+        node = self.select_node(state)
+        selected = time.perf_counter()
+        depth = state.moves - root_moves
+        turn = state.to_play
+        if self.rollout_batch > 1:
+            results = batch_roll_out(state, self.rollout_batch, self.rng)
+            rolled = time.perf_counter()
+            self.back_propagate_results(node, turn, results)
+            num_rollouts = self.rollout_batch
+        else:
+            outcome = self.roll_out(state)
+            rolled = time.perf_counter()
+            profile.rollout_moves += state.moves - root_moves - depth
+            profile.single_rollouts += 1
+            if self.rave:
+                moves = [(col, player) for col, player, _, _ in state.history]
+                self.back_propagate_rave(node, turn, outcome, moves)
+            else:
+                self.back_propagate(node, turn, outcome)
+            num_rollouts = 1
+        propagated = time.perf_counter()
+        while state.moves > root_moves:
+            state.undo()
+        rewound = time.perf_counter()
+
+        profile.select_time += selected - start - (profile.expand_time - expand_time)
+        profile.rollout_time += rolled - selected
+        profile.backprop_time += propagated - rolled
+        profile.rewind_time += rewound - propagated
+        profile.simulations += 1
+        profile.rollouts += num_rollouts
+        profile.selection_depth += depth
+        profile.max_depth = max(profile.max_depth, depth)
+        return num_rollouts
+
+    def expand_instrumented(self, parent: Node, state: ConnectState) -> bool:
+        start = time.perf_counter()
+        expanded = MCTS.expand(self, parent, state)
+        self.search_profile.expand_time += time.perf_counter() - start
+        self.search_profile.expansions += expanded
+        return expanded
+
+    def profile(self) -> SearchProfile:
+        # Phase breakdown of the latest search or pondering, None unless instrumented
+        return self.search_profile
+
+    def start_pondering(self):
+        # Keeps growing the tree from root_state in a background thread, typically while
+        # the opponent thinks. search and move stop it before touching the tree, so the
+        # reply's subtree is promoted with everything pondered under it. A root-parallel
+        # search rebuilds the root and does not benefit.
+        self.stop_pondering()
+        if self.root_state.is_terminal_node():
+            return
+        self.ponder_stop.clear()
+        self.ponder_rollouts = 0
+        self.ponder_thread = threading.Thread(target=self.ponder, daemon=True)
+        self.ponder_thread.start()
+
+    def ponder(self):
+        state = self.root_state.copy()
+        root_moves = state.moves
+        simulate = self.simulate
+        if self.instrument:
+            # pondering gets its own profile so it does not mix into the next search's
+            self.search_profile = SearchProfile()
+            simulate = self.simulate_instrumented
+        start_time = time.perf_counter()
+        while not self.ponder_stop.is_set() and self.root.outcome == UNPROVEN:
+            self.ponder_rollouts += simulate(state, root_moves)
+        if self.instrument:
+            self.search_profile.run_time = time.perf_counter() - start_time
+            self.search_profile.tree_nodes = self.node_count
+
+    def stop_pondering(self):
+        if self.ponder_thread is not None:
+            self.ponder_stop.set()
+            self.ponder_thread.join()
+            self.ponder_thread = None
+
+    def search(self, time_limit: int):
+        self.stop_pondering()
+        self.time_limit = time_limit
+        self.wall_start, self.cpu_start = time.perf_counter(), time.process_time()
+        if self.instrument:
+            self.search_profile = SearchProfile()
+        if self.book_move() is not None:
+            self.run_time = 0
+            self.num_rollouts = 0
+            return
+        if self.batch_size > 1:
+            self.search_tree_parallel(time_limit)
+        elif self.workers > 1:
+            self.search_root_parallel(time_limit)
+        else:
+            self.search_serial(time_limit)
+        if self.instrument:
+            self.search_profile.run_time = self.run_time
+            self.search_profile.tree_nodes = self.node_count
+
+    def search_serial(self, time_limit):
+        start_time = time.process_time()
+
+        # One scratch state is played forward for every simulation and rewound afterwards
+        state = self.root_state.copy()
+        root_moves = state.moves
+
+        simulate = self.simulate_instrumented if self.instrument else self.simulate
+
+        num_rollouts = 0
+        while time.process_time() - start_time < time_limit and self.root.outcome == UNPROVEN:
+            num_rollouts += simulate(state, root_moves)
+
+        run_time = time.process_time() - start_time
+        self.run_time = run_time
+        self.num_rollouts = num_rollouts
+
+    def search_tree_parallel(self, time_limit):
+        if self.pool is None and self.workers > 1:
+            self.pool = multiprocessing.Pool(self.workers)
+        start_time = time.perf_counter()
+
+        state = self.root_state.copy()
+        root_moves = state.moves
+        # timed per batch rather than per simulation; rollout lengths stay in the workers
+        profile = self.search_profile if self.instrument else None
+
+        num_rollouts = 0
+        while time.perf_counter() - start_time < time_limit and self.root.outcome == UNPROVEN:
+            # descend batch_size times, marking each path so later descents spread out
+            if profile is not None:
+                batch_start, expand_time = time.perf_counter(), profile.expand_time
+            leaves = []
+            for _ in range(self.batch_size):
+                node = self.select_node(state)
+                leaves.append((node, state.to_play, state.copy()))
+                if profile is not None:
+                    depth = state.moves - root_moves
+                    profile.selection_depth += depth
+                    profile.max_depth = max(profile.max_depth, depth)
+                while state.moves > root_moves:
+                    state.undo()
+                while node is not None:
+                    node.virtual_loss += 1
+                    node = node.parent
+
+            if profile is not None:
+                selected = time.perf_counter()
+            leaf_states = [leaf_state for _, _, leaf_state in leaves]
+            if self.pool is not None:
+                size = -(-len(leaf_states) // self.workers)
+                jobs = [(leaf_states[i:i + size], self.rollout_batch, random.getrandbits(32))
+                        for i in range(0, len(leaf_states), size)]
+                results = [result for chunk in self.pool.map(rollout_worker, jobs) for result in chunk]
+            else:
+                results = rollout_worker((leaf_states, self.rollout_batch, random.getrandbits(32)))
+            if profile is not None:
+                rolled = time.perf_counter()
+
+            for (node, turn, _), result in zip(leaves, results):
+                leaf = node
+                while leaf is not None:
+                    leaf.virtual_loss -= 1
+                    leaf = leaf.parent
+                self.back_propagate_results(node, turn, result)
+            num_rollouts += len(leaves) * self.rollout_batch
+
+            if profile is not None:
+                # the rewinds are part of the descents here
+                profile.select_time += selected - batch_start - (profile.expand_time - expand_time)
+                profile.rollout_time += rolled - selected
+                profile.backprop_time += time.perf_counter() - rolled
+                profile.simulations += len(leaves)
+                profile.rollouts += len(leaves) * self.rollout_batch
+
+        self.run_time = time.perf_counter() - start_time
+        self.num_rollouts = num_rollouts
+
+    def search_root_parallel(self, time_limit):
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.workers)
+        start_time = time.perf_counter()
+
+        # seeds come from this process's generator so a seeded run is reproducible
+        jobs = [(self.root_state, time_limit, random.getrandbits(32), self.node_budget)
+                for _ in range(self.workers)]
+        results = self.pool.map(root_worker, jobs)
+
+        self.release(self.root)
+        self.root = Node(None, None)
+        self.node_count = 1
+        for children, _ in results:
+            for move, (n, q, outcome) in children.items():
+                if move not in self.root.children:
+                    self.root.add_children([Node(move, self.root)])
+                    self.node_count += 1
+                child = self.root.children[move]
+                child.N += n
+                child.Q += q
+                if outcome != UNPROVEN:
+                    child.outcome = outcome
+                self.root.N += n
+
+        proven = [child for child in self.root.children.values() if child.outcome != UNPROVEN]
+        if proven:
+            self.prove(proven[0])
+        self.peak_nodes = max(self.peak_nodes, self.node_count)
+        self.worker_rollouts = [rollouts for _, rollouts in results]
+        self.num_rollouts = sum(self.worker_rollouts)
+        self.run_time = time.perf_counter() - start_time
+        if self.instrument:
+            # every phase ran inside the workers, only the totals are known here
+            self.search_profile.simulations = self.num_rollouts
+            self.search_profile.rollouts = self.num_rollouts
+
+    def merged_statistics(self) -> dict:
+        # Root statistics after a root-parallel search
+        return {
+            "workers": self.workers,
+            "worker_rollouts": self.worker_rollouts,
+            "visits": {move: child.N for move, child in self.root.children.items()},
+            "win_rates": {move: child.Q / child.N for move, child in self.root.children.items() if child.N},
+        }
+
+    def close(self):
+        self.stop_pondering()
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def best_move(self):
+        if self.root_state.is_terminal_node():
+            return -1
+
+        col = self.book_move()
+        if col is not None:
+            if self.telemetry is not None:
+                self.telemetry.write(self.decision_record(col, book=True))
+            return col
+
+        # A proven win is played at once and proven losses only when nothing else is left
+        children = list(self.root.children.values())
+        wins = [n for n in children if n.outcome == PROVEN_WIN]
+        if wins:
+            best_child = random.choice(wins)
+        else:
+            children = [n for n in children if n.outcome != PROVEN_LOSS] or children
+            max_value = max(children, key=lambda n: n.N).N
+            max_nodes = [n for n in children if n.N == max_value]
+            best_child = random.choice(max_nodes)
+
+        if self.telemetry is not None:
+            self.telemetry.write(self.decision_record(best_child.move, book=False))
+        return best_child.move
+
+    def decision_record(self, move, book):
+        # Telemetry for the latest search, timed from its start to now
+        children = self.root.children
+        depth = 0
+        node = self.root
+        while node.children:
+            node = max(node.children.values(), key=lambda n: n.N)
+            depth += 1
+        return decision_record("mcts", state_key(self.root_state), self.root_state.moves, self.time_limit,
+                               self.wall_start, self.cpu_start, move, rollouts=self.num_rollouts,
+                               ponder_rollouts=self.ponder_rollouts, depth=depth, book=book,
+                               outcome=self.root.outcome, nodes=self.node_count,
+                               visits={col: child.N for col, child in children.items()},
+                               win_rates={col: child.Q / child.N for col, child in children.items() if child.N})
+
+    def move(self, move):
+        # Keeps the chosen child's subtree and frees the old root and its siblings now
+        self.stop_pondering()
+        self.root_state.move(move)
+        new_root = self.root.children.pop(move, None)
+        self.node_count -= self.release(self.root)
+
+        if new_root is None:
+            new_root = Node(None, None)
+            self.node_count = 1
+        new_root.parent = None
+        self.root = new_root
+
+    def statistics(self) -> tuple:
+        return self.num_rollouts, self.run_time
+
+    def tree_statistics(self) -> dict:
+        return {
+            "nodes": self.node_count,
+            "peak_nodes": self.peak_nodes,
+            "node_budget": self.node_budget,
+            "recycled": self.recycled,
+            "bytes_per_node": NODE_BYTES,
+            "tree_bytes": int(self.node_count * NODE_BYTES),
+        }
@@ -0,0 +1,226 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import timeit
+
+import numpy as np
+
+from connect_state import ConnectState, AI, AI_PIECE, PLAYER_PIECE
+from board import winning_move, winning_move_at, get_next_open_row
+from evaluation import score_position, evaluate_window, WINDOWS, Evaluator
+from mcts_engine import MCTS, UNPROVEN
+
+# Times the primitives the engines spend their time in, over a fixed corpus of positions.
+# Results are saved as JSON and can be checked against an earlier run:
+#   python microbench.py --output new.json --baseline old.json --threshold 0.1
+
+# Move sequences from an empty board with the AI to move; none of them ends the game
+CORPUS = {
+    "empty": [],
+    "opening": [1, 4, 6, 6, 6, 0, 2, 0],
+    "midgame": [1, 4, 4, 1, 2, 4, 3, 5, 4, 0, 4, 0, 6, 3, 2, 4, 1, 1, 6, 3],
+    "near_full": [3, 0, 1, 4, 0, 5, 5, 3, 6, 0, 4, 1, 0, 2, 3, 4, 5, 6, 4, 3, 5, 6, 0, 4, 3, 0, 3, 5, 4, 6,
+                  6, 6, 1, 1, 1, 5],
+}
+
+SEED = 0
+TREE_SIMULATIONS = 2000     # simulations grown before timing select_node and back_propagate
+REPEAT = 5
+DEFAULT_THRESHOLD = 0.10    # a primitive more than 10% slower than the baseline is a regression
+
+
+def position(name):
+    state = ConnectState()
+    state.to_play = AI
+    for col in CORPUS[name]:
+        state.move(col)
+    return state
+
+
+def grown_tree(state):
+    random.seed(SEED)
+    mcts = MCTS(state)
+    scratch = mcts.root_state.copy()
+    for _ in range(TREE_SIMULATIONS):
+        mcts.simulate(scratch, scratch.moves)
+    return mcts, scratch
+
+
+# Each bench_* takes a corpus position and returns a function performing one operation,
+# or None where the operation does not occur in that position
+
+def bench_winning_move(state):
+    board = state.board
+    return lambda: winning_move(board, AI_PIECE)
+
+
+def bench_winning_move_at(state):
+    if state.last_move is None:
+        return None     # no piece to check through, winning_move_at would return at once
+    board = state.board
+    col = state.last_move
+    row = state.heights[col] - 1
+    return lambda: winning_move_at(board, row, col)
+
+
+def bench_get_next_open_row(state):
+    board = state.board
+    col = state.get_valid_locations()[0]
+    return lambda: get_next_open_row(board, col)
+
+
+def bench_score_position(state):
+    board = state.board
+    return lambda: score_position(board, AI_PIECE)
+
+
+def bench_evaluate_window(state):
+    window = list(state.board.flatten()[WINDOWS[len(WINDOWS) // 2]])
+    return lambda: evaluate_window(window, PLAYER_PIECE)
+
+
+def bench_evaluator_drop_undo(state):
+    board = state.board
+    evaluator = Evaluator(board)
+    col = state.get_valid_locations()[0]
+    row = state.heights[col]
+
+    def op():
+        evaluator.drop(row, col, AI_PIECE)
+        evaluator.undo(row, col, AI_PIECE)
+    return op
+
+
+def bench_state_move_undo(state):
+    state = state.copy()
+    col = state.get_valid_locations()[0]
+
+    def op():
+        state.move(col)
+        state.undo()
+    return op
+
+
+def bench_select_node(state):
+    mcts, scratch = grown_tree(state)
+    if mcts.root.outcome != UNPROVEN:
+        return None     # the search stops once the root is proven and never selects again
+    root_moves = scratch.moves
+
+    def op():
+        mcts.select_node(scratch)
+        while scratch.moves > root_moves:
+            scratch.undo()
+    return op
+
+
+def bench_roll_out(state):
+    mcts = MCTS(state)
+    scratch = state.copy()
+    root_moves = scratch.moves
+
+    def op():
+        mcts.roll_out(scratch)
+        while scratch.moves > root_moves:
+            scratch.undo()
+    return op
+
+
+def bench_back_propagate(state):
+    mcts, scratch = grown_tree(state)
+    leaf = mcts.select_node(scratch)
+    turn = scratch.to_play
+    outcome = mcts.roll_out(scratch)
+    return lambda: mcts.back_propagate(leaf, turn, outcome)
+
+
+BENCHMARKS = {
+    "winning_move": bench_winning_move,
+    "winning_move_at": bench_winning_move_at,
+    "get_next_open_row": bench_get_next_open_row,
+    "score_position": bench_score_position,
+    "evaluate_window": bench_evaluate_window,
+    "evaluator_drop_undo": bench_evaluator_drop_undo,
+    "state_move_undo": bench_state_move_undo,
+    "mcts_select_node": bench_select_node,
+    "mcts_roll_out": bench_roll_out,
+    "mcts_back_propagate": bench_back_propagate,
+}
+
+
+def measure(op, repeat=REPEAT):
+    # Best of repeat runs, each long enough (about 0.2 s) to swamp the timer overhead
+    timer = timeit.Timer(op)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / number
+
+
+def run(names=None, repeat=REPEAT):
+    results = {}
+    for bench, make in BENCHMARKS.items():
+        if names and not any(name in bench for name in names):
+            continue
+        for corpus in CORPUS:
+            op = make(position(corpus))
+            if op is None:
+                continue
+            seconds = measure(op, repeat)
+            results[f"{bench}/{corpus}"] = {"ns_per_op": seconds * 1e9, "ops_per_sec": 1 / seconds}
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    # Returns the keys that got slower than baseline by more than threshold
+    regressions = []
+    for key, result in current["results"].items():
+        if key not in baseline["results"]:
+            continue
+        ratio = result["ns_per_op"] / baseline["results"][key]["ns_per_op"]
+        if ratio > 1 + threshold:
+            regressions.append((key, ratio))
+    return regressions
+
+
+def print_results(current, baseline=None):
+    for key, result in current["results"].items():
+        line = f"{key:40} {result['ns_per_op']:12.0f} ns/op {result['ops_per_sec']:14.0f} ops/sec"
+        if baseline is not None and key in baseline["results"]:
+            ratio = result["ns_per_op"] / baseline["results"][key]["ns_per_op"]
+            line += f"  x{ratio:.2f}"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the engine primitives")
+    parser.add_argument("--output", help="save the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against results saved earlier")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown against the baseline, as a fraction")
+    parser.add_argument("--only", nargs="*", help="run only the benchmarks whose names contain these")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    args = parser.parse_args()
+
+    current = run(args.only, args.repeat)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_results(current, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if baseline is not None:
+        regressions = compare(current, baseline, args.threshold)
+        for key, ratio in regressions:
+            print(f"REGRESSION {key}: {ratio:.2f}x the baseline time")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,301 @@
+import random
+import math
+import time
+
+from board import (ROW_COUNT, COLUMN_COUNT, EMPTY, PLAYER_PIECE, AI_PIECE, drop_piece, get_next_open_row,
+                   get_valid_location)
+from evaluation import Evaluator, score_position
+from transposition import TranspositionTable, SIDE_KEY, EXACT, LOWER, UPPER, NO_MOVE
+from move_ordering import MoveOrderer
+from solver import board_key
+from telemetry import decision_record, board_moves
+
+
+WIN_SCORE = 100000
+
+
+class SearchTimeout(Exception):
+    # Raised inside minimax_ab once the deadline passes; the iteration is abandoned
+    pass
+
+
+class SearchStats:
+    # Node counters for one search call, filled in by minimax / minimax_ab
+    def __init__(self):
+        self.nodes = 0      # positions visited, leaves included
+        self.interior = 0   # positions whose children were searched
+        self.children = 0   # children searched below interior positions
+        self.cutoffs = 0    # alpha-beta cutoffs
+        self.tt_cutoffs = 0 # positions answered from the transposition table
+        self.first_move_cutoffs = 0     # cutoffs caused by the first child searched
+
+    def merge(self, other):
+        # Adds another search's counters, e.g. from a game played in another process
+        self.nodes += other.nodes
+        self.interior += other.interior
+        self.children += other.children
+        self.cutoffs += other.cutoffs
+        self.tt_cutoffs += other.tt_cutoffs
+        self.first_move_cutoffs += other.first_move_cutoffs
+
+    def branching_factor(self):
+        return self.children / self.interior if self.interior else 0.0
+
+    def first_move_cutoff_rate(self):
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def __repr__(self):
+        return (f"nodes={self.nodes} cutoffs={self.cutoffs} "
+                f"branching={self.branching_factor():.2f} "
+                f"first_move_cutoffs={self.first_move_cutoff_rate():.0%}")
+
+
+def terminal_value(board, depth, evaluator):
+    # Returns the leaf value, or None when the node has to be expanded further
+    if evaluator.fours[AI_PIECE]:
+        return WIN_SCORE
+    elif evaluator.fours[PLAYER_PIECE]:
+        return -WIN_SCORE
+    elif evaluator.pieces == ROW_COUNT * COLUMN_COUNT:
+        return 0
+    elif depth == 0:
+        return evaluator.score(AI_PIECE)
+    return None
+
+
+def minimax(board, depth, maximizingPlayer, evaluator=None, stats=None):
+    # Children are searched by dropping into board and taking the piece back out;
+    # evaluator follows every drop so leaves are scored in O(1)
+    if evaluator is None:
+        evaluator = Evaluator(board)
+    if stats is not None:
+        stats.nodes += 1
+    leaf = terminal_value(board, depth, evaluator)
+    if leaf is not None:
+        return None, leaf
+    valid_locations = get_valid_location(board)
+    if stats is not None:
+        stats.interior += 1
+        stats.children += len(valid_locations)
+
+    if maximizingPlayer:
+        value = -math.inf
+        column = random.choice(valid_locations)
+        for col in valid_locations:
+            row = get_next_open_row(board, col)
+            drop_piece(board, row, col, AI_PIECE)
+            evaluator.drop(row, col, AI_PIECE)
+            new_score = minimax(board, depth-1, False, evaluator, stats)[1]
+            evaluator.undo(row, col, AI_PIECE)
+            drop_piece(board, row, col, EMPTY)
+            if new_score > value:
+                value = new_score
+                column = col  #得到产生best score的column
+
+        return column, value
+    else:
+        value = math.inf
+        column = random.choice(valid_locations)
+        for col in valid_locations:
+            row = get_next_open_row(board, col)
+            drop_piece(board, row, col, PLAYER_PIECE)
+            evaluator.drop(row, col, PLAYER_PIECE)
+            new_score = minimax(board, depth-1, True, evaluator, stats)[1]
+            evaluator.undo(row, col, PLAYER_PIECE)
+            drop_piece(board, row, col, EMPTY)
+            if new_score < value:
+                value = new_score
+                column = col
+        return column, value
+
+
+def book_move(book, board, maximizingPlayer):
+    # (column, value) from an OpeningBook, with the value seen from AI_PIECE like the search's
+    hit = book.lookup_board(board, AI_PIECE if maximizingPlayer else PLAYER_PIECE)
+    if hit is None:
+        return None
+    column, value = hit
+    if book.exact:  # solver scores only carry the result across
+        value = WIN_SCORE if value > 0 else -WIN_SCORE if value < 0 else 0
+    return column, value if maximizingPlayer else -value
+
+
+def minimax_ab(board, depth, maximizingPlayer, alpha, beta, evaluator=None, stats=None, table=None, deadline=None,
+               orderer=None, book=None):
+    # table is an optional TranspositionTable shared across calls, deadline a time.perf_counter() value,
+    # orderer a MoveOrderer; without one children are searched left to right.
+    # book is an OpeningBook consulted for this position only, not passed down.
+    if book is not None:
+        hit = book_move(book, board, maximizingPlayer)
+        if hit is not None:
+            return hit
+    if evaluator is None:
+        evaluator = Evaluator(board)
+    if stats is not None:
+        stats.nodes += 1
+    if deadline is not None and time.perf_counter() > deadline:
+        raise SearchTimeout()
+    leaf = terminal_value(board, depth, evaluator)
+    if leaf is not None:
+        return None, leaf
+
+    tt_move = None
+    if table is not None:
+        alpha_orig, beta_orig = alpha, beta
+        key = evaluator.key ^ SIDE_KEY if maximizingPlayer else evaluator.key
+        entry = table.probe(key)
+        if entry is not None:
+            tt_value, tt_depth, tt_bound, tt_move = entry
+            if tt_depth >= depth:
+                if tt_bound == EXACT:
+                    hit = True
+                elif tt_bound == LOWER:
+                    alpha = max(alpha, tt_value)
+                    hit = alpha >= beta
+                else:
+                    beta = min(beta, tt_value)
+                    hit = alpha >= beta
+                if hit:
+                    if stats is not None:
+                        stats.tt_cutoffs += 1
+                    return tt_move, tt_value
+
+    valid_locations = get_valid_location(board)
+    if stats is not None:
+        stats.interior += 1
+    piece = AI_PIECE if maximizingPlayer else PLAYER_PIECE
+    if orderer is not None:
+        valid_locations = orderer.order(valid_locations, evaluator.pieces, piece,
+                                        None if tt_move == NO_MOVE else tt_move)
+
+    if maximizingPlayer:
+        value = -math.inf
+        column = random.choice(valid_locations)
+        for i, col in enumerate(valid_locations):
+            row = get_next_open_row(board, col)
+            drop_piece(board, row, col, AI_PIECE)
+            evaluator.drop(row, col, AI_PIECE)
+            new_score = minimax_ab(board, depth-1, False, alpha, beta, evaluator, stats, table, deadline, orderer)[1]
+            evaluator.undo(row, col, AI_PIECE)
+            drop_piece(board, row, col, EMPTY)
+            if stats is not None:
+                stats.children += 1
+            if new_score > value:
+                value = new_score
+                column = col  #得到产生best score的column
+            alpha = max(alpha,value)
+            if alpha>= beta:
+                if stats is not None:
+                    stats.cutoffs += 1
+                    if i == 0:
+                        stats.first_move_cutoffs += 1
+                if orderer is not None:
+                    orderer.record_cutoff(col, evaluator.pieces, piece, depth)
+                break
+
+    else:
+        value = math.inf
+        column = random.choice(valid_locations)
+        for i, col in enumerate(valid_locations):
+            row = get_next_open_row(board, col)
+            drop_piece(board, row, col, PLAYER_PIECE)
+            evaluator.drop(row, col, PLAYER_PIECE)
+            new_score = minimax_ab(board, depth-1, True, alpha, beta, evaluator, stats, table, deadline, orderer)[1]
+            evaluator.undo(row, col, PLAYER_PIECE)
+            drop_piece(board, row, col, EMPTY)
+            if stats is not None:
+                stats.children += 1
+            if new_score < value:
+                value = new_score
+                column = col
+            beta = min(beta,value)
+            if alpha >= beta:
+                if stats is not None:
+                    stats.cutoffs += 1
+                    if i == 0:
+                        stats.first_move_cutoffs += 1
+                if orderer is not None:
+                    orderer.record_cutoff(col, evaluator.pieces, piece, depth)
+                break
+
+    if table is not None:
+        if value <= alpha_orig:
+            bound = UPPER
+        elif value >= beta_orig:
+            bound = LOWER
+        else:
+            bound = EXACT
+        table.store(key, depth, bound, value, column)
+    return column, value
+
+
+def iterative_deepening(board, time_limit, max_depth=None, table=None, stats=None, orderer=None, book=None,
+                        telemetry=None):
+    # Searches depth 1, 2, 3... until time_limit seconds have passed and returns
+    # (column, value, depth) of the deepest iteration that finished; depth is 0 for a book move.
+    # The table carries each iteration's best moves into the next one's ordering.
+    # telemetry is an optional TelemetrySink that gets one record for the decision.
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    if telemetry is not None and stats is None:
+        stats = SearchStats()
+    nodes_start = stats.nodes if stats is not None else 0
+    if telemetry is not None:
+        position_key, moves = board_key(board), board_moves(board)
+    if book is not None:
+        hit = book_move(book, board, True)
+        if hit is not None:
+            if telemetry is not None:
+                telemetry.write(decision_record("iterative_deepening", position_key, moves, time_limit, wall_start,
+                                                cpu_start, hit[0], score=hit[1], depth=0, nodes=0, book=True))
+            return hit[0], hit[1], 0
+    deadline = time.perf_counter() + time_limit
+    if table is None:
+        table = TranspositionTable(1 << 20)
+    if orderer is None:
+        orderer = MoveOrderer()
+    else:
+        orderer.age()
+    # an abandoned iteration unwinds without taking its pieces back, so search a copy
+    board = board.copy()
+    evaluator = Evaluator(board)
+    empty_cells = ROW_COUNT * COLUMN_COUNT - evaluator.pieces
+    if max_depth is None or max_depth > empty_cells:
+        max_depth = empty_cells
+
+    # depth 1 always runs to completion so there is a move to return
+    column, value = minimax_ab(board, 1, True, -math.inf, math.inf, evaluator, stats, table, None, orderer)
+    depth_reached = 1
+    for depth in range(2, max_depth + 1):
+        if abs(value) >= WIN_SCORE:
+            break   # forced result, deeper searches cannot change it
+        try:
+            column, value = minimax_ab(board, depth, True, -math.inf, math.inf, evaluator, stats, table, deadline,
+                                       orderer)
+        except SearchTimeout:
+            break
+        depth_reached = depth
+
+    if telemetry is not None:
+        telemetry.write(decision_record("iterative_deepening", position_key, moves, time_limit, wall_start,
+                                        cpu_start, column, score=value, depth=depth_reached,
+                                        nodes=stats.nodes - nodes_start, book=False))
+    return column, value, depth_reached
+
+
+def pick_last_move(board, piece):
+
+    valid_locations = get_valid_location(board)
+    best_score = -10000
+    best_col = random.choice(valid_locations)
+
+    for col in valid_locations:
+        row = get_next_open_row(board,col)
+        temp_board = board.copy()
+        drop_piece(temp_board, row, col, piece)
+        score = score_position(temp_board, piece)
+
+        if score > best_score:
+            best_score = score
+            best_col = col
+
+    return  best_col
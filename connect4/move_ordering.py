@@ -0,0 +1,41 @@
+from board import ROW_COUNT, COLUMN_COUNT
+
+# Columns from the centre outwards; central columns take part in the most windows
+CENTER_ORDER = [3, 2, 4, 1, 5, 0, 6]
+CENTER_RANK = [CENTER_ORDER.index(col) for col in range(COLUMN_COUNT)]
+
+KILLER_SLOTS = 2
+
+
+class MoveOrderer:
+    # Orders children for minimax_ab: hash move, then killer moves of the ply,
+    # then the rest by history score with the centre-out order breaking ties.
+    # Plies are counted in pieces on the board, so killers carry over between
+    # iterations and between moves of the same game.
+    def __init__(self):
+        self.killers = [[None] * KILLER_SLOTS for _ in range(ROW_COUNT * COLUMN_COUNT + 1)]
+        self.history = [None, [0] * COLUMN_COUNT, [0] * COLUMN_COUNT]    # per piece, per column
+
+    def order(self, valid_locations, ply, piece, hash_move=None):
+        history = self.history[piece]
+        moves = sorted(valid_locations, key=lambda col: (-history[col], CENTER_RANK[col]))
+        for killer in reversed(self.killers[ply]):
+            if killer is not None and killer in moves:
+                moves.remove(killer)
+                moves.insert(0, killer)
+        if hash_move is not None and hash_move in moves:
+            moves.remove(hash_move)
+            moves.insert(0, hash_move)
+        return moves
+
+    def record_cutoff(self, col, ply, piece, depth):
+        killers = self.killers[ply]
+        if killers[0] != col:
+            killers[1] = killers[0]
+            killers[0] = col
+        self.history[piece][col] += depth * depth
+
+    def age(self):
+        # Halve history between searches so old positions fade out
+        for piece in (1, 2):
+            self.history[piece] = [h // 2 for h in self.history[piece]]
@@ -0,0 +1,186 @@
+import argparse
+import math
+import os
+import struct
+import time
+
+import numpy as np
+
+from connect_state import ROW_COUNT, COLUMN_COUNT, PLAYER_PIECE, AI_PIECE, H1, has_four
+from minimax import minimax_ab
+from move_ordering import MoveOrderer
+from solver import Solver, BOTTOM_MASKS, COLUMN_MASKS, TOP_MASKS, key, position_from_board, position_from_state
+from transposition import TranspositionTable
+
+# Book file layout, little endian:
+#   header  MAGIC, version, entry count, plies covered, exact flag
+#   keys    uint64[count], sorted ascending
+#   moves   int8[count]
+#   values  int32[count]
+# Keys are solver keys (stones of the side to move + all stones), so an entry is the
+# same whichever colour is to move, and only the smaller of a position and its mirror
+# image is stored. Lookups memory-map the file and binary-search the keys, so every
+# process using the book shares one read-only copy through the page cache.
+
+MAGIC = b"C4BK"
+VERSION = 1
+HEADER = struct.Struct("<4sIIIB")
+
+DEFAULT_BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+
+COLUMN_BITS = (1 << H1) - 1
+
+
+def mirror(bitboard):
+    # Reflects a bitboard (or a key, which never carries between columns) left to right
+    result = 0
+    for c in range(COLUMN_COUNT):
+        result |= ((bitboard >> (c * H1)) & COLUMN_BITS) << ((COLUMN_COUNT - 1 - c) * H1)
+    return result
+
+
+def canonical_key(current, mask):
+    # (key, mirrored) for the smaller of the position and its mirror image
+    k = key(current, mask)
+    m = mirror(k)
+    return (m, True) if m < k else (k, False)
+
+
+class OpeningBook:
+    def __init__(self, path=DEFAULT_BOOK_PATH):
+        with open(path, "rb") as f:
+            magic, version, count, plies, exact = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not an opening book")
+        self.path = path
+        self.count = count
+        self.plies = plies
+        self.exact = bool(exact)
+        offset = HEADER.size
+        self.keys = np.memmap(path, dtype="<u8", mode="r", offset=offset, shape=(count,))
+        offset += 8 * count
+        self.moves = np.memmap(path, dtype="i1", mode="r", offset=offset, shape=(count,))
+        offset += count
+        self.values = np.memmap(path, dtype="<i4", mode="r", offset=offset, shape=(count,))
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return self.count
+
+    def lookup(self, current, mask):
+        # (column, value) for the side to move, or None if the position is not in the book
+        k, mirrored = canonical_key(current, mask)
+        i = int(np.searchsorted(self.keys, k))
+        if i == self.count or int(self.keys[i]) != k:
+            self.misses += 1
+            return None
+        self.hits += 1
+        col = int(self.moves[i])
+        if mirrored:
+            col = COLUMN_COUNT - 1 - col
+        return col, int(self.values[i])
+
+    def lookup_board(self, board, piece):
+        current, mask, moves = position_from_board(board, piece)
+        if moves > self.plies:
+            return None
+        return self.lookup(current, mask)
+
+    def lookup_state(self, state):
+        if state.moves > self.plies or state.is_terminal_node():
+            return None
+        current, mask, moves = position_from_state(state)
+        return self.lookup(current, mask)
+
+
+_books = {}
+
+
+def load_book(path=DEFAULT_BOOK_PATH):
+    # Shared OpeningBook for path, or None when no book has been generated
+    if path not in _books:
+        _books[path] = OpeningBook(path) if os.path.exists(path) else None
+    return _books[path]
+
+
+def write_book(path, entries, plies, exact):
+    # entries maps canonical key -> (column, value)
+    keys = np.array(sorted(entries), dtype="<u8")
+    moves = np.array([entries[int(k)][0] for k in keys], dtype="i1")
+    values = np.array([entries[int(k)][1] for k in keys], dtype="<i4")
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(keys), plies, int(exact)))
+        f.write(keys.tobytes())
+        f.write(moves.tobytes())
+        f.write(values.tobytes())
+
+
+def book_positions(plies):
+    # (current, mask, moves) of every position with at most plies stones that is
+    # still in play, one per mirror pair
+    seen = set()
+    frontier = [(0, 0, 0)]
+    positions = []
+    while frontier:
+        current, mask, moves = frontier.pop()
+        k, mirrored = canonical_key(current, mask)
+        if k in seen:
+            continue
+        seen.add(k)
+        positions.append((current, mask, moves))
+        if moves == plies:
+            continue
+        for col in range(COLUMN_COUNT):
+            if mask & TOP_MASKS[col]:
+                continue
+            move = (mask + BOTTOM_MASKS[col]) & COLUMN_MASKS[col]
+            if not has_four(current | move):
+                frontier.append((current ^ mask, mask | move, moves + 1))
+    return positions
+
+
+def board_from_position(current, mask):
+    # NumPy board with the side to move as AI_PIECE, for the minimax engine
+    board = np.zeros((ROW_COUNT, COLUMN_COUNT))
+    for r in range(ROW_COUNT):
+        for c in range(COLUMN_COUNT):
+            bit = 1 << (c * H1 + r)
+            if current & bit:
+                board[r][c] = AI_PIECE
+            elif mask & bit:
+                board[r][c] = PLAYER_PIECE
+    return board
+
+
+def generate(path, plies, depth, exact):
+    # Exact mode solves every position; otherwise each gets a depth-limited minimax_ab
+    positions = book_positions(plies)
+    print(f"{len(positions)} positions up to {plies} plies")
+    solver = Solver() if exact else None
+    table = TranspositionTable()
+    orderer = MoveOrderer()
+    entries = {}
+    start_time = time.time()
+    for n, (current, mask, moves) in enumerate(positions):
+        if exact:
+            col, value = solver.best_move(current, mask, moves)
+        else:
+            col, value = minimax_ab(board_from_position(current, mask), depth, True, -math.inf, math.inf,
+                                    table=table, orderer=orderer)
+        k, mirrored = canonical_key(current, mask)
+        entries[k] = (COLUMN_COUNT - 1 - col if mirrored else col, int(value))
+        if (n + 1) % 100 == 0:
+            print(f"{n + 1}/{len(positions)} positions, {time.time() - start_time:.1f} seconds")
+    write_book(path, entries, plies, exact)
+    print(f"Wrote {len(entries)} entries to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the opening book")
+    parser.add_argument("--plies", type=int, default=4, help="cover every position with up to this many stones")
+    parser.add_argument("--depth", type=int, default=8, help="minimax_ab depth per position")
+    parser.add_argument("--exact", action="store_true", help="solve every position instead of searching")
+    parser.add_argument("--output", default=DEFAULT_BOOK_PATH)
+    args = parser.parse_args()
+    generate(args.output, args.plies, args.depth, args.exact)
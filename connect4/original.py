@@ -1,9 +1,10 @@
 import sys
 import math
 
-import numpy as np
 import pygame
 
+from board import create_board, drop_piece, is_valid_location, get_next_open_row, print_board, winning_move_at
+
 ROW_COUNT = 6
 COLUMN_COUNT = 7
 
@@ -15,50 +16,6 @@ BLACK = (0,0,0)
 RED =  (255,0,0)
 YELLOW = (255,255,0)
 
-def create_board():
-    board = np.zeros((ROW_COUNT, COLUMN_COUNT))
-    return board
-
-def drop_piece(board, row, col, piece):
-    board[row][col] = piece
-    return board
-
-def is_valid_location(board, col):
-    return board[ROW_COUNT-1][col] == 0
-
-def get_next_open_row(board, col):
-    for r in range(ROW_COUNT):
-        if board[r][col] == 0:
-            return r
-
-def print_board(board):
-    print(np.flip(board, 0))
-
-def winning_move(board, piece):
-    #check horizontal
-    for c in range(COLUMN_COUNT - 3):
-        for r in range(ROW_COUNT):
-            if board[r][c] == piece and board[r][c+1] == piece and board[r][c+2] == piece and board[r][c+3] == piece:
-                return True
-
-    #check vertical
-    for c in range(COLUMN_COUNT):
-        for r in range(ROW_COUNT - 3):
-            if board[r][c] == piece and board[r+1][c] == piece and board[r+2][c] == piece and board[r+3][c] == piece:
-                return True
-
-    #check positively sloped diaganols
-    for c in range(COLUMN_COUNT - 3):
-        for r in range(ROW_COUNT - 3):
-            if board[r][c] == piece and board[r+1][c+1] == piece and board[r+2][c+2] == piece and board[r+3][c+3] == piece:
-                return True
-
-    #check negatively sloped diaganols
-    for c in range(COLUMN_COUNT - 3):
-        for r in range(3, ROW_COUNT):
-            if board[r][c] == piece and board[r-1][c+1] == piece and board[r-2][c+2] == piece and board[r-3][c+3] == piece:
-                return True
-
 def draw_board(board):
     for c in range(COLUMN_COUNT):
         for r in range(ROW_COUNT):
@@ -130,7 +87,7 @@ while not game_over:
                     row = get_next_open_row(board, col)
                     board = drop_piece(board, row, col, 1)
 
-                    if winning_move(board, 1):
+                    if winning_move_at(board, row, col):
                         label = myfont.render("Player 1 win", 1, RED)
                         screen.blit(label, (40,10))
                         print("Player 1 win")
@@ -144,7 +101,7 @@ while not game_over:
                     row = get_next_open_row(board, col)
                     board = drop_piece(board, row, col, 2)
 
-                    if winning_move(board, 2):
+                    if winning_move_at(board, row, col):
                         label = myfont.render("Player 2 win", 1, YELLOW)
                         screen.blit(label, (40, 10))
                         print("Player 2 win")
@@ -0,0 +1,281 @@
+import time
+from array import array
+
+from connect_state import ROW_COUNT, COLUMN_COUNT, PLAYER, AI, AI_PIECE, H1
+from telemetry import decision_record
+
+# Exact solver: negamax over bitboards with null-window narrowing, a
+# transposition table, centre-first / threat-count ordering and pruning of moves
+# that hand the opponent an immediate win.
+#
+# A position is (current, mask, moves): current holds the stones of the side to
+# move, mask every stone, moves the number of stones played.  Bit layout matches
+# ConnectState: bit index = col * H1 + row with a sentinel bit per column.
+#
+# Scores follow the usual convention: 0 is a draw, a positive score means the side
+# to move wins and is the number of its own stones still unplayed when it does, so
+# faster wins score higher; a negative score is a loss measured the same way for
+# the opponent.
+
+CELL_COUNT = ROW_COUNT * COLUMN_COUNT
+BOTTOM_MASK = sum(1 << (c * H1) for c in range(COLUMN_COUNT))
+BOARD_MASK = BOTTOM_MASK * ((1 << ROW_COUNT) - 1)
+COLUMN_MASKS = [((1 << ROW_COUNT) - 1) << (c * H1) for c in range(COLUMN_COUNT)]
+TOP_MASKS = [1 << (ROW_COUNT - 1 + c * H1) for c in range(COLUMN_COUNT)]
+BOTTOM_MASKS = [1 << (c * H1) for c in range(COLUMN_COUNT)]
+
+CENTER_ORDER = [3, 2, 4, 1, 5, 0, 6]
+# (tie-break rank, column mask) in centre-out order, the rank favours central columns
+ORDERED_COLUMNS = [(len(CENTER_ORDER) - i, COLUMN_MASKS[col]) for i, col in enumerate(CENTER_ORDER)]
+
+MIN_SCORE = -CELL_COUNT // 2 + 3
+MAX_SCORE = (CELL_COUNT + 1) // 2 - 3
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+
+TABLE_SIZE = (1 << 20) + 7      # prime, 9 bytes per entry
+
+
+class SolverTimeout(Exception):
+    pass
+
+
+def popcount(m):
+    return bin(m).count("1")
+
+
+def winning_cells(position, mask):
+    # Empty cells that would complete a four for the stones in position
+    # vertical
+    r = (position << 1) & (position << 2) & (position << 3)
+    for shift in (H1, H1 - 1, H1 + 1):
+        # horizontal and both diagonals: three stones around the gap, on either side
+        p = (position << shift) & (position << 2 * shift)
+        r |= p & (position << 3 * shift)
+        r |= p & (position >> shift)
+        p = (position >> shift) & (position >> 2 * shift)
+        r |= p & (position << shift)
+        r |= p & (position >> 3 * shift)
+    return r & (BOARD_MASK ^ mask)
+
+
+def possible(mask):
+    # One bit per playable column: the lowest empty cell
+    return (mask + BOTTOM_MASK) & BOARD_MASK
+
+
+def can_win_next(current, mask):
+    return winning_cells(current, mask) & possible(mask) != 0
+
+
+def non_losing_moves(current, mask):
+    # Playable cells that do not let the opponent win on the next move
+    possible_mask = possible(mask)
+    opponent_win = winning_cells(current ^ mask, mask)
+    forced = possible_mask & opponent_win
+    if forced:
+        if forced & (forced - 1):
+            return 0    # two immediate threats, every move loses
+        possible_mask = forced
+    return possible_mask & ~(opponent_win >> 1)
+
+
+def is_winning_column(current, mask, col):
+    return winning_cells(current, mask) & possible(mask) & COLUMN_MASKS[col] != 0
+
+
+def key(current, mask):
+    # Unique per position: adding mask sets a marker bit above each column's stones
+    return current + mask
+
+
+def position_from_board(board, piece):
+    # (current, mask, moves) for a 6x7 NumPy board with piece to move
+    current = mask = moves = 0
+    for r in range(ROW_COUNT):
+        for c in range(COLUMN_COUNT):
+            cell = int(board[r][c])
+            if cell:
+                bit = 1 << (c * H1 + r)
+                mask |= bit
+                moves += 1
+                if cell == piece:
+                    current |= bit
+    return current, mask, moves
+
+
+def position_from_state(state):
+    to_play = AI if state.to_play == AI else PLAYER
+    mask = state.bitboards[PLAYER] | state.bitboards[AI]
+    return state.bitboards[to_play], mask, state.moves
+
+
+def state_key(state):
+    # key() of a ConnectState, e.g. to identify positions in telemetry
+    current, mask, _ = position_from_state(state)
+    return key(current, mask)
+
+
+def board_key(board, piece=AI_PIECE):
+    current, mask, _ = position_from_board(board, piece)
+    return key(current, mask)
+
+
+def describe(score, moves):
+    # (WIN / DRAW / LOSS, plies until the game ends with best play) for a score
+    # seen by the side to move after moves stones
+    if score == 0:
+        return DRAW, CELL_COUNT - moves
+    outcome = WIN if score > 0 else LOSS
+    # the last stone lands on a ply of the winner's parity
+    last = 44 - 2 * abs(score)
+    winner_parity = (moves + 1) % 2 if score > 0 else moves % 2
+    if last % 2 != winner_parity:
+        last -= 1
+    return outcome, last - moves
+
+
+class Solver:
+    def __init__(self, table_size=TABLE_SIZE):
+        self.table_size = table_size
+        self.keys = array('Q', bytes(8 * table_size))
+        self.values = array('B', bytes(table_size))
+        self.nodes = 0
+        self.deadline = None
+
+    def reset(self):
+        self.keys = array('Q', bytes(8 * self.table_size))
+        self.values = array('B', bytes(self.table_size))
+
+    def negamax(self, current, mask, moves, alpha, beta):
+        # Assumes the side to move cannot win immediately
+        self.nodes += 1
+        if self.deadline is not None and self.nodes & 4095 == 0 and time.perf_counter() > self.deadline:
+            raise SolverTimeout()
+
+        next_moves = non_losing_moves(current, mask)
+        if next_moves == 0:
+            return -((CELL_COUNT - moves) // 2)
+        if moves >= CELL_COUNT - 2:
+            return 0
+
+        low = -((CELL_COUNT - 2 - moves) // 2)
+        if alpha < low:
+            alpha = low
+            if alpha >= beta:
+                return alpha
+        high = (CELL_COUNT - 1 - moves) // 2
+
+        k = current + mask
+        i = k % self.table_size
+        val = self.values[i] if self.keys[i] == k else 0     # stored values are never 0
+        if val:
+            if val > MAX_SCORE - MIN_SCORE + 1:     # stored lower bound
+                low = val + 2 * MIN_SCORE - MAX_SCORE - 2
+                if alpha < low:
+                    alpha = low
+                    if alpha >= beta:
+                        return alpha
+            else:                                   # stored upper bound
+                high = val + MIN_SCORE - 1
+        if beta > high:
+            beta = high
+            if alpha >= beta:
+                return beta
+
+        # most new threats first, centre columns first among equals
+        children = []
+        for rank, column_mask in ORDERED_COLUMNS:
+            move = next_moves & column_mask
+            if move:
+                children.append(((popcount(winning_cells(current | move, mask)) << 3) | rank, move))
+        children.sort(reverse=True)
+
+        opponent = current ^ mask
+        for _, move in children:
+            score = -self.negamax(opponent, mask | move, moves + 1, -beta, -alpha)
+            if score >= beta:
+                self.keys[i] = k
+                self.values[i] = score + MAX_SCORE - 2 * MIN_SCORE + 2
+                return score
+            if score > alpha:
+                alpha = score
+
+        self.keys[i] = k
+        self.values[i] = alpha - MIN_SCORE + 1
+        return alpha
+
+    def solve(self, current, mask, moves):
+        if can_win_next(current, mask):
+            return (CELL_COUNT + 1 - moves) // 2
+        low = -((CELL_COUNT - moves) // 2)
+        high = (CELL_COUNT + 1 - moves) // 2
+        # null-window searches narrowing [low, high] down to the exact score
+        while low < high:
+            med = low + (high - low) // 2
+            if med <= 0 and -(-low // 2) < med:
+                med = -(-low // 2)
+            elif med >= 0 and high // 2 > med:
+                med = high // 2
+            r = self.negamax(current, mask, moves, med, med + 1)
+            if r <= med:
+                high = r
+            else:
+                low = r
+        return low
+
+    def best_move(self, current, mask, moves):
+        # (column, score) of an optimal move for the side to move
+        valid = [col for col in CENTER_ORDER if not mask & TOP_MASKS[col]]
+        for col in valid:
+            if is_winning_column(current, mask, col):
+                return col, (CELL_COUNT + 1 - moves) // 2
+        score = self.solve(current, mask, moves)
+        # one null-window search per child is enough to confirm it reaches the score
+        for col in valid:
+            move = (mask + BOTTOM_MASKS[col]) & COLUMN_MASKS[col]
+            opponent = current ^ mask
+            if can_win_next(opponent, mask | move):
+                continue
+            if -self.negamax(opponent, mask | move, moves + 1, -score, -score + 1) >= score:
+                return col, score
+        # every move loses at once, any column will do
+        return valid[0], score
+
+
+_solver = None
+
+
+def perfect_move(board, piece=AI_PIECE, time_limit=None, solver=None, book=None, telemetry=None):
+    # Drop-in for minimax_ab in the game loop: (column, score) of an optimal move for
+    # piece. With time_limit, returns (None, None) if the position is not solved in time.
+    # Only an exact book (generated with --exact) is consulted.
+    global _solver
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    current, mask, moves = position_from_board(board, piece)
+    if book is not None and book.exact:
+        hit = book.lookup_board(board, piece)
+        if hit is not None:
+            if telemetry is not None:
+                telemetry.write(decision_record("solver", key(current, mask), moves, time_limit, wall_start,
+                                                cpu_start, hit[0], score=hit[1], nodes=0, book=True))
+            return hit
+    if solver is None:
+        if _solver is None:
+            _solver = Solver()
+        solver = _solver
+    solver.deadline = None if time_limit is None else time.perf_counter() + time_limit
+    nodes_start = solver.nodes
+    try:
+        col, score = solver.best_move(current, mask, moves)
+    except SolverTimeout:
+        col, score = None, None
+    finally:
+        solver.deadline = None
+    if telemetry is not None and col is not None:
+        # a timed-out solve writes nothing, the caller's fallback search records the decision
+        telemetry.write(decision_record("solver", key(current, mask), moves, time_limit, wall_start, cpu_start,
+                                        col, score=score, nodes=solver.nodes - nodes_start, book=False))
+    return col, score
@@ -0,0 +1,87 @@
+import gzip
+import json
+import time
+
+import numpy as np
+
+
+# One JSON line per engine decision, for lining up move latency with search effort over
+# many games. Records carry at least: engine, key, moves, time_budget, wall_time, cpu_time,
+# move; searches add nodes or rollouts, depth, score and, for MCTS, the visit distribution.
+
+BUFFER_RECORDS = 256
+
+
+def decision_record(engine, position_key, moves, time_budget, wall_start, cpu_start, move, **fields):
+    # wall_start / cpu_start are time.perf_counter() / time.process_time() taken when the decision began
+    record = {
+        "engine": engine,
+        "key": position_key,
+        "moves": moves,
+        "time_budget": time_budget,
+        "wall_time": time.perf_counter() - wall_start,
+        "cpu_time": time.process_time() - cpu_start,
+        "move": move,
+    }
+    record.update(fields)
+    return record
+
+
+def board_moves(board):
+    return int(np.count_nonzero(board))
+
+
+def to_json(value):
+    # numpy scalars from the board and evaluation code
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+class TelemetrySink:
+    def __init__(self, path=None, compress=None, buffer_records=BUFFER_RECORDS):
+        # Records are buffered and written buffer_records at a time. compress defaults to
+        # gzip when path ends in .gz. Without a path the records are only kept in
+        # self.records, e.g. to be sent back from a pool process.
+        self.path = path
+        self.buffer_records = buffer_records
+        self.buffer = []
+        self.records = []
+        self.written = 0
+        self.file = None
+        if path is not None:
+            if compress is None:
+                compress = path.endswith(".gz")
+            self.file = gzip.open(path, "at", encoding="utf-8") if compress else open(path, "a", encoding="utf-8")
+
+    def write(self, record):
+        record.setdefault("time", time.time())
+        if self.path is None:
+            self.records.append(record)
+            return
+        self.buffer.append(json.dumps(record, separators=(",", ":"), default=to_json))
+        if len(self.buffer) >= self.buffer_records:
+            self.flush()
+
+    def flush(self):
+        if self.file is not None and self.buffer:
+            self.file.write("\n".join(self.buffer) + "\n")
+            self.written += len(self.buffer)
+            self.buffer = []
+            self.file.flush()
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_records(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
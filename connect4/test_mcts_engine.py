@@ -0,0 +1,25 @@
+import random
+
+from connect_state import ConnectState, AI
+from mcts_engine import MCTS
+
+
+def self_play(seed, node_budget, time_limit):
+    random.seed(seed)
+    state = ConnectState()
+    state.to_play = AI
+    mcts = MCTS(state, node_budget=node_budget)
+    while not state.is_terminal_node():
+        mcts.search(time_limit)
+        col = mcts.best_move()
+        assert state.is_valid_location(col)
+        state.move(col)
+        mcts.move(col)
+    assert mcts.node_count <= node_budget
+
+
+def test_budgeted_self_play():
+    # A tight budget makes recycle() run near proven nodes, which must keep the children
+    # best_move() needs once they become the root
+    for seed in range(10):
+        self_play(seed, 30, 0.02)
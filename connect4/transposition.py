@@ -0,0 +1,92 @@
+import random
+from array import array
+
+from board import ROW_COUNT, COLUMN_COUNT
+
+# Zobrist keys: one random 64-bit number per (piece, cell); a position's key is the
+# xor of the numbers of its occupied cells, so a drop or an undo is a single xor.
+# Seeded so keys, and therefore table contents, are reproducible between runs.
+_rng = random.Random(20240417)
+ZOBRIST = [[_rng.getrandbits(64) for _ in range(ROW_COUNT * COLUMN_COUNT)] for _ in range(3)]
+ZOBRIST_BASE = _rng.getrandbits(64) | 1     # keeps every key non-zero, 0 marks an empty slot
+SIDE_KEY = _rng.getrandbits(64)             # xor-ed in when the maximizing side is to move
+
+EXACT = 0
+LOWER = 1   # value is a lower bound (search failed high)
+UPPER = 2   # value is an upper bound (search failed low)
+
+NO_MOVE = -1
+
+# key + value + depth + bound + move, stored in typed arrays
+ENTRY_BYTES = 8 + 4 + 1 + 1 + 1
+
+
+def zobrist_hash(board):
+    key = ZOBRIST_BASE
+    for r in range(ROW_COUNT):
+        for c in range(COLUMN_COUNT):
+            piece = int(board[r][c])
+            if piece:
+                key ^= ZOBRIST[piece][r * COLUMN_COUNT + c]
+    return key
+
+
+class TranspositionTable:
+    # Buckets of two slots: slot 0 keeps the deepest search seen for that bucket,
+    # slot 1 is always replaced, so recent shallow results are not lost either
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        buckets = 1
+        while buckets * 4 * ENTRY_BYTES <= max_bytes:
+            buckets *= 2
+        self.mask = buckets - 1
+        size = buckets * 2
+        self.keys = array('Q', bytes(8 * size))
+        self.values = array('i', bytes(4 * size))
+        self.depths = array('b', bytes(size))
+        self.bounds = array('b', bytes(size))
+        self.moves = array('b', bytes(size))
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0     # probes that found the bucket holding other positions
+        self.stores = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def memory(self):
+        return len(self.keys) * ENTRY_BYTES
+
+    def probe(self, key):
+        # Returns (value, depth, bound, move) or None
+        i = (key & self.mask) << 1
+        keys = self.keys
+        if keys[i] != key:
+            i += 1
+            if keys[i] != key:
+                self.misses += 1
+                if keys[i] or keys[i - 1]:
+                    self.collisions += 1
+                return None
+        self.hits += 1
+        return self.values[i], self.depths[i], self.bounds[i], self.moves[i]
+
+    def store(self, key, depth, bound, value, move):
+        i = (key & self.mask) << 1
+        keys = self.keys
+        if keys[i] != key and keys[i] and self.depths[i] > depth:
+            i += 1
+        keys[i] = key
+        self.values[i] = value
+        self.depths[i] = depth
+        self.bounds[i] = bound
+        self.moves[i] = NO_MOVE if move is None else move
+        self.stores += 1
+
+    def clear(self):
+        size = len(self.keys)
+        self.keys = array('Q', bytes(8 * size))
+        self.hits = self.misses = self.collisions = self.stores = 0
+
+    def statistics(self) -> dict:
+        return {"entries": len(self.keys), "bytes": self.memory(), "hits": self.hits,
+                "misses": self.misses, "collisions": self.collisions, "stores": self.stores}